@@ -1,3 +1,18 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import ExportArtifact, ExportJob
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "family", "requested_by", "status", "progress", "total", "worker", "heartbeat_at", "finished_at")
+    list_filter = ("status", "kind")
+    raw_id_fields = ("family", "requested_by", "artifact")
+
+
+@admin.register(ExportArtifact)
+class ExportArtifactAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "family", "data_version", "size", "created_at", "expires_at")
+    list_filter = ("kind",)
+    raw_id_fields = ("family",)
+    readonly_fields = ("options_key",)
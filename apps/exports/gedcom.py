@@ -0,0 +1,292 @@
+"""
+Streaming GEDCOM 5.5.1 export of one family.
+
+Nothing here holds the whole family in memory: people and relationships
+are read with server-side cursors (.iterator(chunk_size=...)) and every
+record is yielded as soon as it is written.
+
+A GEDCOM FAM record is a couple and/or the children they share. Here a
+FAM exists for every spouse pair and for every distinct set of parents a
+child has. Parent sets are keyed by (lowest parent id, highest parent id
+or 0), so xrefs are deterministic and an INDI record can name its FAMC/
+FAMS families without looking anything up: @I{person}@ and @F{a}S{b}@.
+
+A FAM has at most two partners, so a child recorded with more than two
+parents is linked to the lowest and highest of them only; the others get
+no FAMS for that child.
+"""
+from datetime import date
+from heapq import merge
+from itertools import groupby
+
+from django.db.models import Count, Max, Min
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Greatest, Least
+
+from apps.persons.models import Person
+from apps.relationships.models import Relationship
+
+CHUNK_SIZE = 2000
+
+# FAM records are emitted in batches so partner genders (HUSB vs WIFE)
+# can be read with one query per batch instead of one per family.
+FAM_BATCH = 500
+
+MONTHS = ["JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"]
+
+SEX = {"male": "M", "female": "F"}
+
+# Longest line value before the text is continued with CONC
+MAX_VALUE = 200
+
+RELATIONSHIP_TABLE = Relationship._meta.db_table
+PERSON_TABLE = Person._meta.db_table
+
+# FAMC key of the person in the outer query: their own parent set
+FAMC_SQL = f"""
+SELECT 'F' || MIN(c.related_person_id)
+    || 'S' || CASE WHEN COUNT(*) > 1 THEN MAX(c.related_person_id) ELSE 0 END
+FROM {RELATIONSHIP_TABLE} c
+WHERE c.person_id = {PERSON_TABLE}.id AND c.relationship_type = 'child'
+HAVING COUNT(*) > 0
+"""
+
+# FAMS keys of the person in the outer query: every spouse pair they are
+# in, whichever direction the row is stored in (as _spouse_pairs), and
+# the parent set of every child they have (same rule as FAMC) unless they
+# are a third or later parent, who is not a HUSB/WIFE of that FAM.
+FAMS_SQL = f"""
+SELECT array_agg(DISTINCT fam ORDER BY fam) FROM (
+    SELECT 'F' || LEAST(s.person_id, s.related_person_id)
+        || 'S' || GREATEST(s.person_id, s.related_person_id) AS fam
+    FROM {RELATIONSHIP_TABLE} s
+    WHERE {PERSON_TABLE}.id IN (s.person_id, s.related_person_id) AND s.relationship_type = 'spouse'
+    UNION
+    SELECT 'F' || MIN(p.related_person_id)
+        || 'S' || CASE WHEN COUNT(*) > 1 THEN MAX(p.related_person_id) ELSE 0 END
+    FROM {RELATIONSHIP_TABLE} k
+    JOIN {RELATIONSHIP_TABLE} p
+      ON p.person_id = k.person_id AND p.relationship_type = 'child'
+    WHERE k.related_person_id = {PERSON_TABLE}.id AND k.relationship_type = 'child'
+    GROUP BY k.person_id
+    HAVING {PERSON_TABLE}.id IN (MIN(p.related_person_id), MAX(p.related_person_id))
+) fams
+"""
+
+
+SUBMITTER_XREF = "@SUBM@"
+
+
+def person_xref(person_id):
+    return f"@I{person_id}@"
+
+
+def family_xref(first_id, second_id=0):
+    return f"@F{first_id}S{second_id or 0}@"
+
+
+def gedcom_date(value):
+    if not value:
+        return None
+    return f"{value.day} {MONTHS[value.month - 1]} {value.year}"
+
+
+def _escape(text):
+    # A literal "@" must be doubled outside of xrefs
+    return str(text).replace("@", "@@")
+
+
+def _split_point(line):
+    """
+    Where to cut `line` for a CONC: at most MAX_VALUE characters, and
+    never beside a space (readers trim line ends, 5.5.1 forbids it) or
+    inside an escaped "@@".
+    """
+    if len(line) <= MAX_VALUE:
+        return len(line)
+    for cut in range(MAX_VALUE, 0, -1):
+        before, after = line[cut - 1], line[cut]
+        if before != " " and after != " " and not (before == "@" and after == "@"):
+            return cut
+    return MAX_VALUE
+
+
+def text_lines(level, tag, text):
+    """Yield `tag` with `text`, continued over CONT (new line) and CONC (long line) records."""
+    for i, line in enumerate(_escape(text).splitlines() or [""]):
+        head = f"{level} {tag}" if i == 0 else f"{level + 1} CONT"
+        cut = _split_point(line)
+        chunk, line = line[:cut], line[cut:]
+        yield f"{head} {chunk}".rstrip()
+        while line:
+            cut = _split_point(line)
+            chunk, line = line[:cut], line[cut:]
+            yield f"{level + 1} CONC {chunk}"
+
+
+def header(family):
+    return "\n".join([
+        "0 HEAD",
+        "1 SOUR FAMILYTREE",
+        "2 NAME Family Tree",
+        "1 DATE " + gedcom_date(date.today()),
+        "1 GEDC",
+        "2 VERS 5.5.1",
+        "2 FORM LINEAGE-LINKED",
+        "1 CHAR UTF-8",
+        f"1 SUBM {SUBMITTER_XREF}",
+        *text_lines(1, "NOTE", f"Export of family {family.name}"),
+    ]) + "\n"
+
+
+def submitter_record(family):
+    """The SUBM record HEAD points to (required by 5.5.1): the family's owner."""
+    owner = family.owner
+    name = owner.get_full_name() or owner.username
+    return "\n".join([f"0 {SUBMITTER_XREF} SUBM", *text_lines(1, "NAME", name)]) + "\n"
+
+
+def _event(tag, when, place):
+    lines = [f"1 {tag}"]
+    if when:
+        lines.append(f"2 DATE {gedcom_date(when)}")
+    if place:
+        lines.extend(text_lines(2, "PLAC", place))
+    return lines
+
+
+def individual_rows(family_id):
+    return (
+        Person.objects.filter(family_id=family_id)
+        # Correlated subqueries rather than joins: no GROUP BY over Person,
+        # and each one is an index lookup on the relationship table
+        .annotate(famc=RawSQL(FAMC_SQL, []), fams=RawSQL(FAMS_SQL, []))
+        .order_by("id")
+        .values_list(
+            "id", "first_name", "middle_name", "last_name", "gender",
+            "birth_date", "birth_place", "death_date", "death_place", "is_living", "notes",
+            "famc", "fams",
+        )
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+
+
+def individual_record(row):
+    (pid, first, middle, last, gender, birth_date, birth_place,
+     death_date, death_place, is_living, notes, famc, fams) = row
+
+    given = " ".join(part for part in (first, middle) if part)
+    name = f"{given} /{last or ''}/".strip()
+    lines = [f"0 {person_xref(pid)} INDI", f"1 NAME {_escape(name)}"]
+    if given:
+        lines.append(f"2 GIVN {_escape(given)}")
+    if last:
+        lines.append(f"2 SURN {_escape(last)}")
+    lines.append(f"1 SEX {SEX.get(gender, 'U')}")
+    if birth_date or birth_place:
+        lines.extend(_event("BIRT", birth_date, birth_place))
+    if death_date or death_place:
+        lines.extend(_event("DEAT", death_date, death_place))
+    elif not is_living:
+        lines.append("1 DEAT Y")
+    if notes:
+        lines.extend(text_lines(1, "NOTE", notes))
+    if famc:
+        lines.append(f"1 FAMC @{famc}@")
+    for fam in fams or ():
+        lines.append(f"1 FAMS @{fam}@")
+    return "\n".join(lines) + "\n"
+
+
+def _parent_sets(family_id):
+    """
+    (low parent, high parent or 0, child id) for every child, ordered by
+    parent set. Parents between the lowest and highest id are left out.
+    """
+    rows = (
+        Relationship.objects.filter(family_id=family_id, relationship_type="child")
+        .values("person_id")
+        .annotate(low=Min("related_person_id"), high=Max("related_person_id"), n=Count("id"))
+        .order_by("low", "high", "person_id")
+        .values_list("low", "high", "n", "person_id")
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    for low, high, n, child_id in rows:
+        yield low, high if n > 1 else 0, child_id
+
+
+def _spouse_pairs(family_id):
+    """
+    (low spouse, high spouse, None) for every couple, in the same order.
+    A couple counts whichever direction its rows are stored in.
+    """
+    rows = (
+        Relationship.objects.filter(family_id=family_id, relationship_type="spouse")
+        .annotate(low=Least("person_id", "related_person_id"), high=Greatest("person_id", "related_person_id"))
+        .values_list("low", "high")
+        .distinct()
+        .order_by("low", "high")
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    for low, high in rows:
+        yield low, high, None
+
+
+def family_groups(family_id):
+    """
+    Yield (low, high, [child ids]) per FAM in one pass: the child rows and
+    the spouse pairs arrive sorted by the same key and are merged, so each
+    family's children are contiguous and only one family is held at once.
+    """
+    stream = merge(_parent_sets(family_id), _spouse_pairs(family_id), key=lambda r: (r[0], r[1]))
+    for (low, high), rows in groupby(stream, key=lambda r: (r[0], r[1])):
+        yield low, high, [child for _, _, child in rows if child is not None]
+
+
+def _partners(low, high, genders):
+    """Assign HUSB/WIFE: by gender where known, otherwise in id order."""
+    ids = [pid for pid in (low, high) if pid]
+    if len(ids) == 1:
+        tag = "WIFE" if genders.get(ids[0]) == "female" else "HUSB"
+        return [(tag, ids[0])]
+    if genders.get(low) == "female" or genders.get(high) == "male":
+        low, high = high, low
+    return [("HUSB", low), ("WIFE", high)]
+
+
+def family_record(low, high, children, genders):
+    lines = [f"0 {family_xref(low, high)} FAM"]
+    for tag, pid in _partners(low, high, genders):
+        lines.append(f"1 {tag} {person_xref(pid)}")
+    for child_id in children:
+        lines.append(f"1 CHIL {person_xref(child_id)}")
+    return "\n".join(lines) + "\n"
+
+
+def _family_batches(family_id):
+    batch = []
+    for group in family_groups(family_id):
+        batch.append(group)
+        if len(batch) >= FAM_BATCH:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def family_records(family_id):
+    for batch in _family_batches(family_id):
+        ids = {pid for low, high, _ in batch for pid in (low, high) if pid}
+        genders = dict(Person.objects.filter(id__in=ids).values_list("id", "gender"))
+        for low, high, children in batch:
+            yield family_record(low, high, children, genders)
+
+
+def export_family(family):
+    """Yield the GEDCOM document for `family` record by record."""
+    yield header(family)
+    yield submitter_record(family)
+    for row in individual_rows(family.id):
+        yield individual_record(row)
+    yield from family_records(family.id)
+    yield "0 TRLR\n"
@@ -0,0 +1,327 @@
+"""
+Bulk GEDCOM import into an existing family.
+
+The file is read twice, one level-0 record at a time, so memory holds a
+single record plus the xref -> Person id map:
+
+1. INDI records become Person rows, bulk_create'd in chunks.
+2. FAM records become Relationship rows (both directions of every
+   spouse and parent/child edge), bulk_create'd in chunks.
+
+Each chunk is its own transaction. bulk_create skips Model.save and the
+post_save signals, so the per-row work those normally do (reverse edge
+lookups, search vector, ancestry closure, caches) is done once per chunk
+or once at the end instead.
+
+Records are parsed into python-gedcom elements, so names, sex and
+birth/death data are read with its IndividualElement helpers.
+
+The character set comes from a byte-order mark or the header's CHAR
+line. Bytes that do not decode are replaced and reported rather than
+aborting the import. Python has no ANSEL codec, so ANSEL files are read
+as ASCII and their accented letters are reported that way.
+"""
+import codecs
+import re
+from dataclasses import dataclass, field
+from datetime import date
+
+from django.db import transaction
+from gedcom.element.element import Element
+from gedcom.element.family import FamilyElement
+from gedcom.element.individual import IndividualElement
+
+from apps.families.models import Family
+from apps.persons.models import LIFESPAN, Person
+from apps.persons.search import PERSON_SEARCH_VECTOR, PHONETIC_CODES
+from apps.relationships import closure
+from apps.relationships.models import Relationship
+from apps.search import autocomplete
+from apps.search.graph import invalidate_family_graph
+
+BATCH_SIZE = 2000
+
+LINE_RE = re.compile(r"^\s*(\d+) (?:(@[^@]+@) )?([A-Za-z0-9_]+)(?: (.*))?$")
+
+MONTHS = {m: i for i, m in enumerate(
+    ["JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"], 1
+)}
+
+GENDERS = {"M": "male", "F": "female"}
+
+ELEMENT_CLASSES = {"INDI": IndividualElement, "FAM": FamilyElement}
+
+# HEAD.CHAR value -> Python codec
+CHARSETS = {
+    "UTF-8": "utf-8",
+    "UNICODE": "utf-16",
+    "ANSI": "cp1252",
+    # Files labelled ASCII often hold Windows-1252 accents; it is a superset
+    "ASCII": "cp1252",
+    "ANSEL": "ascii",
+}
+
+CHAR_RE = re.compile(rb"^\s*1 CHAR (\S+)")
+
+# Lines of the header searched for a CHAR line
+HEADER_LINES = 50
+
+
+@dataclass
+class ImportResult:
+    persons: int = 0
+    relationships: int = 0
+    families: int = 0
+    malformed_lines: int = 0
+    undecodable_lines: int = 0
+    encoding: str = "utf-8"
+    errors: list = field(default_factory=list)
+
+
+def detect_encoding(lines):
+    """Codec for a GEDCOM byte stream: from its byte-order mark, else HEAD.CHAR, else UTF-8."""
+    for i, raw in enumerate(lines):
+        if not isinstance(raw, bytes):
+            return "utf-8"
+        if i == 0:
+            if raw.startswith(codecs.BOM_UTF8):
+                return "utf-8-sig"
+            if raw.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+                return "utf-16"
+            if b"\x00" in raw:
+                # UTF-16 without a byte-order mark: "0 HEAD" has a NUL after every letter
+                return "utf-16-be" if raw.startswith(b"\x00") else "utf-16-le"
+        match = CHAR_RE.match(raw)
+        if match:
+            return CHARSETS.get(match[1].decode("ascii", "replace").upper(), "utf-8")
+        if i >= HEADER_LINES or (i and raw.startswith(b"0 ")):
+            break
+    return "utf-8"
+
+
+def decode_lines(lines, encoding, result=None):
+    """
+    Re-split a byte stream into text lines. The decoder is incremental
+    because the stream's own line splits fall inside UTF-16 characters.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    pending = ""
+    for raw in lines:
+        pending += decoder.decode(raw) if isinstance(raw, bytes) else raw
+        parts = pending.splitlines(keepends=True)
+        pending = parts.pop() if parts and not parts[-1].endswith(("\n", "\r")) else ""
+        for line in parts:
+            if result is not None and "\ufffd" in line:
+                result.undecodable_lines += 1
+            yield line
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        if result is not None and "\ufffd" in pending:
+            result.undecodable_lines += 1
+        yield pending
+
+
+def records(lines, result=None):
+    """
+    Yield each level-0 record of a GEDCOM stream as a python-gedcom
+    element tree. `lines` are text lines (see decode_lines).
+    """
+    current, stack = None, []
+    for line in lines:
+        match = LINE_RE.match(line.rstrip("\r\n").lstrip("\ufeff"))
+        if not match:
+            if line.strip() and result is not None:
+                result.malformed_lines += 1
+            continue
+        level, pointer, tag, value = int(match[1]), match[2] or "", match[3], match[4] or ""
+        if level == 0:
+            if current is not None:
+                yield current
+            current = ELEMENT_CLASSES.get(tag, Element)(0, pointer, tag, value, multi_line=False)
+            stack = [current]
+            continue
+        if current is None or level > len(stack):
+            if result is not None:
+                result.malformed_lines += 1
+            continue
+        del stack[level:]
+        element = Element(level, pointer, tag, value, multi_line=False)
+        stack[-1].add_child_element(element)
+        stack.append(element)
+    if current is not None:
+        yield current
+
+
+def parse_date(value):
+    """Exact "D MON YYYY" dates only; anything partial or approximate is None."""
+    parts = (value or "").upper().split()
+    if len(parts) != 3 or parts[1] not in MONTHS:
+        return None
+    try:
+        return date(int(parts[2]), MONTHS[parts[1]], int(parts[0]))
+    except ValueError:
+        return None
+
+
+def _child_value(element, tag):
+    for child in element.get_child_elements():
+        if child.get_tag() == tag:
+            return child.get_multi_line_value()
+    return ""
+
+
+def person_from_record(record, family, user):
+    given, surname = record.get_name()
+    given_parts = given.split()
+    birth_raw, birth_place, _ = record.get_birth_data()
+    death_raw, death_place, _ = record.get_death_data()
+    birth_date, death_date = parse_date(birth_raw), parse_date(death_raw)
+
+    notes = [_child_value(record, "NOTE")]
+    # Keep dates we cannot store exactly ("ABT 1850", "1850") as text
+    if birth_raw and not birth_date:
+        notes.append(f"Born: {birth_raw}")
+    if death_raw and not death_date:
+        notes.append(f"Died: {death_raw}")
+
+    return Person(
+        family=family,
+        first_name=(given_parts[0] if given_parts else "Unknown")[:100],
+        middle_name=" ".join(given_parts[1:])[:100] or None,
+        last_name=surname[:100],
+        gender=GENDERS.get(record.get_gender().upper()[:1], "other"),
+        birth_date=birth_date,
+        birth_place=birth_place[:200],
+        death_date=death_date,
+        death_place=death_place[:200] or None,
+        is_living=not record.is_deceased(),
+        notes="\n".join(n for n in notes if n),
+        created_by=user,
+    )
+
+
+def _edges(record, xref_map, result):
+    """Relationship rows (both directions) for one FAM record, as (person, related, type)."""
+    partners, children = [], []
+    for child in record.get_child_elements():
+        tag, xref = child.get_tag(), child.get_value().strip()
+        if tag not in ("HUSB", "WIFE", "CHIL"):
+            continue
+        if xref not in xref_map:
+            result.errors.append(f"{record.get_pointer()}: unknown individual {xref}")
+            continue
+        (children if tag == "CHIL" else partners).append(xref_map[xref])
+
+    if len(partners) == 2 and partners[0] != partners[1]:
+        a, b = partners
+        yield a, b, "spouse"
+        yield b, a, "spouse"
+    for parent_id in partners:
+        for child_id in children:
+            if parent_id == child_id:
+                continue
+            yield parent_id, child_id, "parent"
+            yield child_id, parent_id, "child"
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def import_gedcom(open_lines, family, user=None, dry_run=False, batch_size=BATCH_SIZE, progress=None):
+    """
+    Import a GEDCOM file into `family`. `open_lines` is a callable that
+    returns a fresh iterator over the file's lines; it is called once per
+    pass. With `dry_run` the file is fully parsed and validated (every FAM
+    xref must resolve) but nothing is written. `progress(stage, count)` is
+    called after every chunk.
+    """
+    result = ImportResult()
+    report = progress or (lambda stage, count: None)
+    head = open_lines()
+    try:
+        result.encoding = detect_encoding(head)
+    finally:
+        if hasattr(head, "close"):
+            head.close()
+
+    def text_lines(counted):
+        return decode_lines(open_lines(), result.encoding, result if counted else None)
+
+    try:
+        _import(text_lines, family, user, dry_run, batch_size, report, result)
+    finally:
+        # Also after a failure part-way: chunks already committed need
+        # their closure rows, and caches must not keep the old data.
+        if not dry_run and (result.persons or result.relationships):
+            closure.rebuild_family(family.id)
+            Family.bump_data_version(family.id)
+            invalidate_family_graph(family.id)
+            autocomplete.invalidate(family.id)
+
+    if result.undecodable_lines:
+        result.errors.insert(0, (
+            f"{result.undecodable_lines} lines contain characters that are not valid "
+            f"{result.encoding}; they were replaced with \ufffd. Check the file's CHAR header."
+        ))
+    report("finished", result.persons)
+    return result
+
+
+def _import(text_lines, family, user, dry_run, batch_size, report, result):
+    # Pass 1: people
+    xref_map = {}
+    individuals = (r for r in records(text_lines(True), result) if r.get_tag() == "INDI")
+    for chunk in _chunks(individuals, batch_size):
+        people = []
+        for record in chunk:
+            xref = record.get_pointer()
+            if not xref or xref in xref_map:
+                result.errors.append(f"Duplicate or missing INDI xref {xref!r}")
+                continue
+            xref_map[xref] = None
+            people.append((xref, person_from_record(record, family, user)))
+
+        if not dry_run:
+            with transaction.atomic():
+                created = Person.objects.bulk_create([p for _, p in people], batch_size=batch_size)
+                # What the persons post_save handler would have done row by row
+                Person.objects.filter(id__in=[p.id for p in created]).update(
+                    search_vector=PERSON_SEARCH_VECTOR, lifespan=LIFESPAN, **PHONETIC_CODES
+                )
+        for xref, person in people:
+            # In a dry run ids are placeholders; only their presence is checked
+            xref_map[xref] = person.id if not dry_run else xref
+        result.persons += len(people)
+        report("persons", result.persons)
+
+    # Pass 2: relationships
+    families = (r for r in records(text_lines(False)) if r.get_tag() == "FAM")
+    for chunk in _chunks(families, batch_size):
+        rows = set()
+        for record in chunk:
+            rows.update(_edges(record, xref_map, result))
+        result.families += len(chunk)
+
+        if not dry_run:
+            with transaction.atomic():
+                Relationship.objects.bulk_create(
+                    [
+                        Relationship(
+                            family=family, person_id=p, related_person_id=r,
+                            relationship_type=t, created_by=user,
+                        )
+                        for p, r, t in rows
+                    ],
+                    batch_size=batch_size,
+                    ignore_conflicts=True,
+                )
+        result.relationships += len(rows)
+        report("relationships", result.relationships)
@@ -0,0 +1,296 @@
+"""
+Export jobs: requesting them, building their files and expiring old ones.
+
+Queued exports (PDF reports, and GEDCOM files or tables requested
+through ExportRequestView) are only recorded by the web request
+(request_export); the work is done by `manage.py run_export_worker`,
+which claims pending jobs with SELECT ... FOR UPDATE SKIP LOCKED and runs
+a bounded number at a time. The direct download endpoints for GEDCOM and
+CSV/JSONL still stream inside the request.
+
+Finished files are ExportArtifacts keyed by (family, kind + options,
+Family.data_version). Any Person/Relationship change bumps the version,
+so an artifact with the current version is exactly what a new build
+would produce, and a repeat request is answered with it straight away.
+
+PDF charts for several people are drawn on a forkserver process pool:
+the job loads its ReportData once and each process receives it at
+start-up.
+"""
+import logging
+import multiprocessing
+import os
+import socket
+import tempfile
+import time
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from apps.families.models import Family
+from apps.persons.models import Person
+from . import tabular
+from .gedcom import export_family
+from .models import ExportArtifact, ExportJob, options_key
+from .pdf import ReportData, init_worker, render_chart, render_in_worker, render_register
+
+logger = logging.getLogger(__name__)
+
+class Progress:
+    """Writes a job's progress counters, at most once per `interval` seconds."""
+
+    def __init__(self, job_id, total=None, interval=1.0):
+        self.job_id = job_id
+        self.interval = interval
+        self._last = 0.0
+        if total is not None:
+            ExportJob.objects.filter(pk=job_id).update(total=total)
+
+    def __call__(self, done, force=False):
+        now = time.monotonic()
+        if force or now - self._last >= self.interval:
+            self._last = now
+            ExportJob.objects.filter(pk=self.job_id).update(progress=done)
+
+
+# -------------------------
+# BUILDERS
+# Each writes the export to `out` and returns its file name.
+# -------------------------
+def _chart_name(data, kind, person_id):
+    return f"{kind}-{slugify(data.name(person_id)) or person_id}-{person_id}.pdf"
+
+
+def build_pdf(job, out):
+    data = ReportData.load(job.family)
+    slug = slugify(data.family_name) or job.family_id
+
+    if job.kind == "register":
+        progress = Progress(job.pk, total=len(data.people))
+        render_register(data, out)
+        progress(len(data.people), force=True)
+        return f"register-{slug}.pdf"
+
+    ids = [pid for pid in job.person_ids if pid in data.people]
+    if not ids:
+        raise ValueError("None of the selected people belong to this family.")
+    progress = Progress(job.pk, total=len(ids))
+    if len(ids) == 1:
+        out.write(render_chart(data, job.kind, ids[0], job.generations))
+        progress(1, force=True)
+        return _chart_name(data, job.kind, ids[0])
+
+    # Never fork this multi-threaded worker: locks held by other threads
+    # (and their database sockets) would be copied into the child. The
+    # forkserver starts children from a clean single-threaded process;
+    # they only import apps.exports.pdf, which needs no Django setup.
+    tasks = [(job.kind, pid, job.generations) for pid in ids]
+    with ProcessPoolExecutor(
+        max_workers=min(settings.EXPORT_PROCESSES, len(ids)),
+        mp_context=multiprocessing.get_context("forkserver"),
+        initializer=init_worker,
+        initargs=(data,),
+    ) as pool, zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+        for done, (pid, pdf) in enumerate(zip(ids, pool.map(render_in_worker, tasks)), 1):
+            zf.writestr(_chart_name(data, job.kind, pid), pdf)
+            progress(done)
+    progress(len(ids), force=True)
+    return f"{job.kind}-{slug}.zip"
+
+
+def build_gedcom(job, out):
+    progress = Progress(job.pk, total=Person.objects.filter(family_id=job.family_id).count())
+    people = 0
+    for record in export_family(job.family):
+        out.write(record.encode("utf-8"))
+        if record.startswith("0 @I"):
+            people += 1
+            progress(people)
+    progress(people, force=True)
+    return f"family-{job.family_id}.ged"
+
+
+def build_table(job, out):
+    dataset, options = job.kind, job.options
+    filters = options.get("filters", {})
+    columns = options.get("columns") or tabular.select_columns(dataset)
+    progress = Progress(job.pk, total=tabular.QUERYSETS[dataset](job.family_id, filters).count())
+    chunks = tabular.export_table(
+        job.family_id, dataset, options.get("format", "csv"), columns, filters,
+        compress=options.get("gzip", False), progress=progress,
+    )
+    for chunk in chunks:
+        out.write(chunk)
+    return tabular.filename(job.family_id, dataset, options.get("format", "csv"), options.get("gzip", False))
+
+
+BUILDERS = {
+    "register": build_pdf,
+    "pedigree": build_pdf,
+    "descendants": build_pdf,
+    "gedcom": build_gedcom,
+    "persons": build_table,
+    "relationships": build_table,
+}
+
+
+# -------------------------
+# ARTIFACTS
+# -------------------------
+def _expiry():
+    return timezone.now() + timedelta(seconds=settings.EXPORT_ARTIFACT_TTL)
+
+
+def find_artifact(family_id, key, data_version):
+    """A live artifact for this build, with its expiry pushed back, or None."""
+    artifact = ExportArtifact.objects.filter(
+        family_id=family_id, options_key=key, data_version=data_version, expires_at__gt=timezone.now()
+    ).first()
+    if artifact is not None:
+        artifact.expires_at = _expiry()
+        ExportArtifact.objects.filter(pk=artifact.pk).update(expires_at=artifact.expires_at)
+    return artifact
+
+
+def store_artifact(job, key, data_version, filename, fh):
+    size = fh.seek(0, 2)
+    fh.seek(0)
+    artifact = ExportArtifact(
+        family_id=job.family_id, kind=job.kind, options=job.build_options, options_key=key,
+        data_version=data_version, size=size, expires_at=_expiry(),
+    )
+    artifact.file.save(filename, File(fh, name=filename), save=False)
+    try:
+        with transaction.atomic():
+            artifact.save()
+        return artifact
+    except IntegrityError:
+        pass
+
+    # The unique constraint ignores expires_at: the row in the way is either
+    # a live build another worker just finished, or an expired one that
+    # expire_artifacts has not swept yet.
+    with transaction.atomic():
+        existing = ExportArtifact.objects.select_for_update().get(
+            family_id=job.family_id, options_key=key, data_version=data_version
+        )
+        if existing.expires_at > timezone.now():
+            artifact.file.delete(save=False)
+            return existing
+        # Expired: take the row over with the new file
+        stale_file = existing.file.name
+        existing.file, existing.size, existing.expires_at = artifact.file.name, size, _expiry()
+        existing.save(update_fields=["file", "size", "expires_at"])
+    if stale_file and stale_file != existing.file.name:
+        existing.file.storage.delete(stale_file)
+    return existing
+
+
+def expire_artifacts():
+    """Delete expired artifacts and their files. Returns how many were removed."""
+    removed = 0
+    for artifact in ExportArtifact.objects.filter(expires_at__lte=timezone.now()).iterator():
+        # Re-checked in the delete: a reuse or a rebuild may have renewed it meanwhile
+        deleted, _ = ExportArtifact.objects.filter(pk=artifact.pk, expires_at__lte=timezone.now()).delete()
+        if deleted:
+            artifact.file.delete(save=False)
+            removed += 1
+    return removed
+
+
+# -------------------------
+# JOBS
+# -------------------------
+def request_export(family, user, kind, person_ids=(), generations=4, options=None):
+    """
+    Create a job for an export. If an artifact for the same build of the
+    family's current data exists, the job is created already done.
+    """
+    job = ExportJob(
+        family=family, requested_by=user, kind=kind,
+        person_ids=list(person_ids), generations=generations, options=options or {},
+    )
+    data_version = Family.objects.values_list("data_version", flat=True).get(pk=family.pk)
+    artifact = find_artifact(family.pk, options_key(kind, job.build_options), data_version)
+    if artifact is not None:
+        job.artifact, job.status = artifact, "done"
+        job.started_at = job.finished_at = timezone.now()
+    job.save()
+    return job
+
+
+def worker_id():
+    """Identifies one run_export_worker process in ExportJob.worker."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def claim_jobs(limit, worker):
+    """Mark up to `limit` pending jobs as running under `worker` and return their ids, oldest first."""
+    with transaction.atomic():
+        ids = list(
+            ExportJob.objects.select_for_update(skip_locked=True)
+            .filter(status="pending")
+            .order_by("created_at")
+            .values_list("id", flat=True)[:limit]
+        )
+        now = timezone.now()
+        ExportJob.objects.filter(id__in=ids).update(
+            status="running", worker=worker, started_at=now, heartbeat_at=now
+        )
+    return ids
+
+
+def heartbeat(worker, job_ids):
+    """Record that `worker` is still alive and running `job_ids`."""
+    if job_ids:
+        ExportJob.objects.filter(id__in=job_ids, status="running", worker=worker).update(
+            heartbeat_at=timezone.now()
+        )
+
+
+def requeue_stale_jobs():
+    """
+    Put back in the queue jobs whose worker died mid-run: running, but
+    without a heartbeat for EXPORT_JOB_HEARTBEAT_TIMEOUT. Live workers
+    beat every few seconds however long a build takes.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.EXPORT_JOB_HEARTBEAT_TIMEOUT)
+    return ExportJob.objects.filter(status="running", heartbeat_at__lt=cutoff).update(
+        status="pending", worker="", started_at=None, heartbeat_at=None, progress=0
+    )
+
+
+def run_job(job_id, worker):
+    """
+    Build a claimed job's export (or reuse a matching artifact) and record
+    the outcome, unless the job was requeued and taken by another worker.
+    """
+    close_old_connections()
+    try:
+        job = ExportJob.objects.select_related("family").get(pk=job_id)
+        status, error, artifact = "done", "", None
+        try:
+            data_version = job.family.data_version
+            key = options_key(job.kind, job.build_options)
+            artifact = find_artifact(job.family_id, key, data_version)
+            if artifact is None:
+                with tempfile.TemporaryFile() as fh:
+                    filename = BUILDERS[job.kind](job, fh)
+                    artifact = store_artifact(job, key, data_version, filename, fh)
+        except Exception as exc:
+            logger.exception("Export job %s failed", job_id)
+            status, error = "failed", str(exc)
+        owned = ExportJob.objects.filter(pk=job_id, status="running", worker=worker).update(
+            status=status, error=error, artifact=artifact, finished_at=timezone.now()
+        )
+        if not owned:
+            logger.warning("Export job %s was taken over by another worker; result not recorded", job_id)
+    finally:
+        connection.close()
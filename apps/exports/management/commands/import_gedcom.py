@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.exports.gedcom_import import BATCH_SIZE, import_gedcom
+from apps.families.models import Family
+
+
+class Command(BaseCommand):
+    help = "Bulk-import a GEDCOM file into an existing family."
+
+    def add_arguments(self, parser):
+        parser.add_argument("family_id", type=int)
+        parser.add_argument("path")
+        parser.add_argument("--user", help="Username recorded as creator (defaults to the family owner).")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument("--dry-run", action="store_true", help="Parse and validate without writing anything.")
+
+    def handle(self, *args, **options):
+        try:
+            family = Family.objects.get(pk=options["family_id"])
+        except Family.DoesNotExist:
+            raise CommandError(f"Family {options['family_id']} does not exist.")
+
+        user = family.owner
+        if options["user"]:
+            try:
+                user = get_user_model().objects.get(username=options["user"])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"User {options['user']} does not exist.")
+
+        path = options["path"]
+        try:
+            open(path, "rb").close()
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        def read_lines():
+            with open(path, "rb") as fh:
+                yield from fh
+
+        def progress(stage, count):
+            self.stdout.write(f"{stage}: {count}")
+
+        result = import_gedcom(
+            read_lines,
+            family,
+            user=user,
+            dry_run=options["dry_run"],
+            batch_size=options["batch_size"],
+            progress=progress,
+        )
+
+        for error in result.errors[:50]:
+            self.stdout.write(self.style.WARNING(error))
+        if len(result.errors) > 50:
+            self.stdout.write(self.style.WARNING(f"... and {len(result.errors) - 50} more"))
+
+        summary = (
+            f"{result.persons} people, {result.families} families, "
+            f"{result.relationships} relationship rows, {result.malformed_lines} malformed lines "
+            f"(read as {result.encoding})"
+        )
+        if options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(f"Dry run OK: {summary} (nothing written)"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Imported {summary}"))
@@ -0,0 +1,78 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.exports.jobs import (
+    claim_jobs,
+    expire_artifacts,
+    heartbeat,
+    requeue_stale_jobs,
+    run_job,
+    worker_id,
+)
+
+# Seconds between heartbeats for running jobs (and checks for orphaned
+# ones); keep well below EXPORT_JOB_HEARTBEAT_TIMEOUT
+HEARTBEAT_INTERVAL = 15
+
+# Seconds between sweeps for expired artifacts
+MAINTENANCE_INTERVAL = 300
+
+
+class Command(BaseCommand):
+    help = "Build queued export jobs, at most --concurrency at a time, and delete expired export files."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=settings.EXPORT_WORKER_CONCURRENCY)
+        parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds between queue checks when idle.")
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is empty.")
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options["concurrency"])
+        poll = options["poll_interval"]
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="export")
+        running = {}
+        worker = worker_id()
+        next_heartbeat = next_maintenance = 0.0
+        self.stdout.write(f"Export worker {worker} started ({concurrency} at a time).")
+
+        try:
+            while True:
+                close_old_connections()
+                if time.monotonic() >= next_heartbeat:
+                    heartbeat(worker, list(running.values()))
+                    requeued = requeue_stale_jobs()
+                    if requeued:
+                        self.stdout.write(f"Requeued {requeued} jobs whose worker stopped responding.")
+                    next_heartbeat = time.monotonic() + HEARTBEAT_INTERVAL
+                if time.monotonic() >= next_maintenance:
+                    expired = expire_artifacts()
+                    if expired:
+                        self.stdout.write(f"Deleted {expired} expired export files.")
+                    next_maintenance = time.monotonic() + MAINTENANCE_INTERVAL
+
+                for job_id in claim_jobs(concurrency - len(running), worker) if len(running) < concurrency else []:
+                    running[executor.submit(run_job, job_id, worker)] = job_id
+                    self.stdout.write(f"Started job {job_id}.")
+
+                if not running:
+                    if options["once"]:
+                        break
+                    time.sleep(poll)
+                    continue
+
+                # Wake as soon as a slot frees up, or after `poll` to look for new work
+                done, _ = wait(running, timeout=poll, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job_id = running.pop(future)
+                    if future.exception() is not None:
+                        self.stderr.write(f"Job {job_id} crashed: {future.exception()}")
+                    else:
+                        self.stdout.write(f"Finished job {job_id}.")
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping; waiting for running jobs to finish.")
+        finally:
+            executor.shutdown(wait=True)
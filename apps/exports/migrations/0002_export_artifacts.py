@@ -0,0 +1,75 @@
+# Generated by Django 5.0 on 2026-10-18 15:12
+
+import apps.exports.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exports', '0001_exportjob'),
+        ('families', '0005_family_data_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='exportjob',
+            name='file',
+        ),
+        migrations.AddField(
+            model_name='exportjob',
+            name='options',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='exportjob',
+            name='progress',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='exportjob',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='exportjob',
+            name='total',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='exportjob',
+            name='kind',
+            field=models.CharField(choices=[('register', 'Family register'), ('pedigree', 'Pedigree chart'), ('descendants', 'Descendant chart'), ('gedcom', 'GEDCOM file'), ('persons', 'People table'), ('relationships', 'Relationships table')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='ExportArtifact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('register', 'Family register'), ('pedigree', 'Pedigree chart'), ('descendants', 'Descendant chart'), ('gedcom', 'GEDCOM file'), ('persons', 'People table'), ('relationships', 'Relationships table')], max_length=20)),
+                ('options', models.JSONField(blank=True, default=dict)),
+                ('options_key', models.CharField(max_length=64)),
+                ('data_version', models.PositiveIntegerField()),
+                ('file', models.FileField(upload_to=apps.exports.models.export_file_path)),
+                ('size', models.BigIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('family', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='export_artifacts', to='families.family')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='exportjob',
+            name='artifact',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='exports.exportartifact'),
+        ),
+        migrations.AddIndex(
+            model_name='exportjob',
+            index=models.Index(fields=['status', 'created_at'], name='exportjob_status_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='exportartifact',
+            constraint=models.UniqueConstraint(fields=('family', 'options_key', 'data_version'), name='exportartifact_unique_build'),
+        ),
+    ]
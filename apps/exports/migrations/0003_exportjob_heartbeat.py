@@ -0,0 +1,23 @@
+# Generated by Django 5.0 on 2026-10-18 15:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exports', '0002_export_artifacts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='exportjob',
+            name='worker',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+    ]
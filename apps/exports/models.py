@@ -1,3 +1,130 @@
+import hashlib
+import json
+
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+from apps.families.models import Family
+
+KIND_CHOICES = [
+    ('register', 'Family register'),
+    ('pedigree', 'Pedigree chart'),
+    ('descendants', 'Descendant chart'),
+    ('gedcom', 'GEDCOM file'),
+    ('persons', 'People table'),
+    ('relationships', 'Relationships table'),
+]
+
+
+def export_file_path(instance, filename):
+    return f"exports/{instance.family_id}/{filename}"
+
+
+def options_key(kind, options):
+    """Stable hash of an export's kind and options, for matching artifacts."""
+    canonical = json.dumps([kind, options], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ExportArtifact(models.Model):
+    """
+    A finished export file. One artifact exists per (family, kind+options,
+    data_version), so repeating an export of unchanged data reuses it.
+    """
+    family = models.ForeignKey(Family, on_delete=models.CASCADE, related_name='export_artifacts')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    options = models.JSONField(default=dict, blank=True)
+    options_key = models.CharField(max_length=64)
+    # Family.data_version the file was built from
+    data_version = models.PositiveIntegerField()
+
+    file = models.FileField(upload_to=export_file_path)
+    size = models.BigIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['family', 'options_key', 'data_version'], name='exportartifact_unique_build'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} for {self.family} (v{self.data_version})"
+
+    @property
+    def filename(self):
+        return self.file.name.rsplit("/", 1)[-1]
+
+
+class ExportJob(models.Model):
+    """
+    A requested export. Jobs are picked up by `manage.py run_export_worker`;
+    the file is on the linked artifact once status is "done".
+    """
+    KIND_CHOICES = KIND_CHOICES
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    family = models.ForeignKey(Family, on_delete=models.CASCADE, related_name='export_jobs')
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='export_jobs'
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    # Charts are drawn for these people (one PDF each, zipped when several)
+    person_ids = models.JSONField(default=list, blank=True)
+    generations = models.PositiveSmallIntegerField(default=4)
+    # Everything else that shapes the output (format, columns, filters, gzip)
+    options = models.JSONField(default=dict, blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    artifact = models.ForeignKey(
+        ExportArtifact, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs'
+    )
+    error = models.TextField(blank=True)
+    # Units done / units expected (people, rows or charts, depending on kind)
+    progress = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+
+    # run_export_worker process that claimed the job, and its last sign of life
+    worker = models.CharField(max_length=100, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='exportjob_status_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} for {self.family} ({self.status})"
+
+    @property
+    def build_options(self):
+        """Options that identify the output, as hashed into ExportArtifact.options_key."""
+        options = dict(self.options)
+        if self.kind in ('pedigree', 'descendants'):
+            options.update(person_ids=sorted(self.person_ids), generations=self.generations)
+        return options
+
+    @property
+    def percent(self):
+        if self.status == 'done':
+            return 100
+        if not self.total:
+            return None
+        return min(100, self.progress * 100 // self.total)
+
+    @property
+    def ready(self):
+        return self.status == 'done' and self.artifact_id is not None
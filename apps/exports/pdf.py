@@ -0,0 +1,301 @@
+"""
+PDF reports drawn with reportlab: a family register, a pedigree chart and
+a descendant chart.
+
+Everything is laid out from a ReportData snapshot (the family's cached
+relationship graph plus one query for names and dates), so rendering
+never goes back to the database and can run in another process.
+
+Nothing is streamed: reportlab's canvas holds every page until save(),
+so a report's memory use grows with its page count. The large one is the
+family register; charts are capped by MAX_PEDIGREE_GENERATIONS or by the
+job's generations.
+"""
+import os
+from io import BytesIO
+
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.units import mm
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+MARGIN = 15 * mm
+MAX_PEDIGREE_GENERATIONS = 6
+
+# Directories searched for DejaVu Sans; PDF_FONT_DIR is tried first
+FONT_DIRS = [
+    os.environ.get("PDF_FONT_DIR", ""),
+    "/usr/share/fonts/truetype/dejavu",
+    "/usr/share/fonts/dejavu",
+    "/usr/local/share/fonts",
+    "/Library/Fonts",
+]
+
+
+def _register_fonts():
+    """
+    Embed DejaVu Sans so names outside Latin-1 are drawn; the standard
+    Helvetica only covers Latin-1. Falls back to Helvetica when the font
+    files are not installed.
+    """
+    for directory in filter(None, FONT_DIRS):
+        regular = os.path.join(directory, "DejaVuSans.ttf")
+        bold = os.path.join(directory, "DejaVuSans-Bold.ttf")
+        if os.path.exists(regular) and os.path.exists(bold):
+            pdfmetrics.registerFont(TTFont("DejaVuSans", regular))
+            pdfmetrics.registerFont(TTFont("DejaVuSans-Bold", bold))
+            return "DejaVuSans", "DejaVuSans-Bold"
+    return "Helvetica", "Helvetica-Bold"
+
+
+FONT, FONT_BOLD = _register_fonts()
+
+
+class ReportData:
+    """
+    Names, dates and edges of one family. Only plain dicts and arrays, so
+    it pickles into worker processes that never import Django models.
+    """
+
+    def __init__(self, family_name, edges, people):
+        self.family_name = family_name
+        # (parents, children, spouses): person id -> array of ids
+        self.edges = edges
+        # id -> (first, middle, last, gender, birth_date, death_date)
+        self.people = people
+
+    @classmethod
+    def load(cls, family):
+        from apps.persons.models import Person
+        from apps.search.graph import get_family_graph
+
+        rows = Person.objects.filter(family=family).values_list(
+            "id", "first_name", "middle_name", "last_name", "gender", "birth_date", "death_date"
+        )
+        people = {row[0]: row[1:] for row in rows.iterator(chunk_size=5000)}
+        graph = get_family_graph(family.id)
+        # Copies, so the shared cached graph is never mutated through us
+        edges = tuple(dict(index) for index in (graph.parents, graph.children, graph.spouses))
+        return cls(family.name, edges, people)
+
+    def name(self, pid):
+        first, middle, last = self.people[pid][:3]
+        return " ".join(part for part in (first, middle, last) if part)
+
+    def dates(self, pid):
+        birth, death = self.people[pid][4:6]
+        if birth and death:
+            return f"{birth.year} – {death.year}"
+        if birth:
+            return f"b. {birth.year}"
+        if death:
+            return f"d. {death.year}"
+        return ""
+
+    def known(self, ids):
+        return [pid for pid in ids if pid in self.people]
+
+    def parents(self, pid):
+        """Parents with the father (or lower id) first."""
+        ids = self.known(self.edges[0].get(pid, ()))
+        return sorted(ids, key=lambda p: (self.people[p][3] != "male", p))
+
+    def father_and_mother(self, pid):
+        """
+        (father, mother), either None when unknown. A parent without a
+        recorded gender takes whichever place is still empty.
+        """
+        slots = [None, None]
+        unknown = []
+        for parent in self.parents(pid):
+            gender = self.people[parent][3]
+            index = 0 if gender == "male" else 1 if gender == "female" else None
+            if index is None or slots[index] is not None:
+                unknown.append(parent)
+            else:
+                slots[index] = parent
+        for parent in unknown:
+            if None in slots:
+                slots[slots.index(None)] = parent
+        return tuple(slots)
+
+    def children(self, pid):
+        return sorted(self.known(self.edges[1].get(pid, ())), key=lambda p: (self.people[p][4] is None, self.people[p][4], p))
+
+    def spouses(self, pid):
+        return sorted(self.known(self.edges[2].get(pid, ())))
+
+    def sort_key(self, pid):
+        first, _, last = self.people[pid][:3]
+        return ((last or "").lower(), (first or "").lower(), pid)
+
+
+class PageWriter:
+    """Top-to-bottom text flow over pages of a canvas."""
+
+    def __init__(self, out, title, pagesize=A4):
+        self.canvas = canvas.Canvas(out, pagesize=pagesize, pageCompression=1)
+        self.canvas.setTitle(title)
+        self.width, self.height = pagesize
+        self.title = title
+        self.page = 0
+        self._new_page()
+
+    def _new_page(self):
+        self.page += 1
+        self.canvas.setFont(FONT, 8)
+        self.canvas.drawString(MARGIN, MARGIN / 2, self.title)
+        self.canvas.drawRightString(self.width - MARGIN, MARGIN / 2, str(self.page))
+        self.y = self.height - MARGIN
+
+    def ensure(self, height):
+        if self.y - height < MARGIN:
+            self.canvas.showPage()
+            self._new_page()
+
+    def text(self, value, size=9, font=FONT, indent=0, leading=None):
+        leading = leading or size * 1.3
+        lines = simpleSplit(value, font, size, self.width - 2 * MARGIN - indent)
+        for line in lines or [""]:
+            self.ensure(leading)
+            self.y -= leading
+            self.canvas.setFont(font, size)
+            self.canvas.drawString(MARGIN + indent, self.y, line)
+
+    def gap(self, height):
+        self.y -= height
+
+    def save(self):
+        self.canvas.showPage()
+        self.canvas.save()
+
+
+def _names(data, ids):
+    return ", ".join(data.name(pid) for pid in ids)
+
+
+def render_register(data, out):
+    """Every person, alphabetically, with dates, parents, spouses and children."""
+    writer = PageWriter(out, f"{data.family_name} – family register")
+    writer.text(f"{data.family_name}", size=16, font=FONT_BOLD)
+    writer.text(f"{len(data.people)} people", size=9)
+    writer.gap(6)
+
+    for pid in sorted(data.people, key=data.sort_key):
+        # Keep a person's heading with at least their first detail line
+        writer.ensure(30)
+        heading = data.name(pid)
+        if data.dates(pid):
+            heading += f"  ({data.dates(pid)})"
+        writer.text(heading, size=10, font=FONT_BOLD)
+        for label, ids in (("Parents", data.parents(pid)), ("Spouses", data.spouses(pid)),
+                           ("Children", data.children(pid))):
+            if ids:
+                writer.text(f"{label}: {_names(data, ids)}", indent=12)
+        writer.gap(4)
+    writer.save()
+
+
+def render_pedigree(data, person_id, generations, out):
+    """Ancestor chart: the person on the left, each generation of parents in the next column."""
+    generations = max(1, min(generations, MAX_PEDIGREE_GENERATIONS))
+    pagesize = landscape(A4)
+    width, height = pagesize
+    c = canvas.Canvas(out, pagesize=pagesize, pageCompression=1)
+    title = f"Pedigree of {data.name(person_id)}"
+    c.setTitle(title)
+    c.setFont(FONT_BOLD, 14)
+    c.drawString(MARGIN, height - MARGIN, title)
+
+    top, bottom = height - MARGIN - 20, MARGIN
+    column = (width - 2 * MARGIN) / generations
+    box_w = column - 8 * mm
+
+    # slots[g] holds 2**g entries (person id or None): fathers on even
+    # slots, mothers on odd ones, so a missing parent leaves its own box empty
+    slots = [[person_id]]
+    for _ in range(1, generations):
+        row = []
+        for pid in slots[-1]:
+            row.extend(data.father_and_mother(pid) if pid is not None else (None, None))
+        slots.append(row)
+
+    centres = {}
+    for g, row in enumerate(slots):
+        slot_h = (top - bottom) / len(row)
+        box_h = min(28, slot_h - 2)
+        x = MARGIN + g * column
+        for i, pid in enumerate(row):
+            if pid is None:
+                continue
+            cy = top - (i + 0.5) * slot_h
+            centres[(g, i)] = cy
+            c.rect(x, cy - box_h / 2, box_w, box_h)
+            size = 8 if box_h >= 18 else max(5, box_h * 0.45)
+            c.setFont(FONT_BOLD, size)
+            name = simpleSplit(data.name(pid), FONT_BOLD, size, box_w - 4)[:1]
+            c.drawString(x + 2, cy + (1 if box_h >= 18 else -size / 3), name[0] if name else "")
+            if box_h >= 18 and data.dates(pid):
+                c.setFont(FONT, 7)
+                c.drawString(x + 2, cy - 9, data.dates(pid))
+            if g > 0:
+                # Elbow from the child's box to this parent
+                child_cy = centres[(g - 1, i // 2)]
+                x0 = MARGIN + (g - 1) * column + box_w
+                mid = x0 + (x - x0) / 2
+                c.line(x0, child_cy, mid, child_cy)
+                c.line(mid, child_cy, mid, cy)
+                c.line(mid, cy, x, cy)
+    c.showPage()
+    c.save()
+
+
+def render_descendants(data, person_id, generations, out):
+    """Indented outline of every descendant, with spouses, down `generations` levels."""
+    writer = PageWriter(out, f"Descendants of {data.name(person_id)}")
+    writer.text(f"Descendants of {data.name(person_id)}", size=14, font=FONT_BOLD)
+    writer.gap(6)
+
+    seen = set()
+    stack = [(person_id, 0)]
+    while stack:
+        pid, depth = stack.pop()
+        if pid in seen:
+            continue
+        seen.add(pid)
+        indent = depth * 14
+        line = f"{depth + 1}. {data.name(pid)}"
+        if data.dates(pid):
+            line += f" ({data.dates(pid)})"
+        writer.text(line, font=FONT_BOLD if depth == 0 else FONT, indent=indent)
+        for spouse in data.spouses(pid):
+            writer.text(f"+ {data.name(spouse)} {data.dates(spouse)}".rstrip(), size=8, indent=indent + 10)
+        if depth + 1 < generations:
+            stack.extend((child, depth + 1) for child in reversed(data.children(pid)))
+    writer.save()
+
+
+RENDERERS = {"pedigree": render_pedigree, "descendants": render_descendants}
+
+
+def render_chart(data, kind, person_id, generations):
+    """Render one person's chart and return the PDF bytes."""
+    out = BytesIO()
+    RENDERERS[kind](data, person_id, generations, out)
+    return out.getvalue()
+
+
+# Process-pool helpers: each worker gets the job's ReportData once, at start-up
+_worker_data = None
+
+
+def init_worker(data):
+    global _worker_data
+    _worker_data = data
+
+
+def render_in_worker(args):
+    kind, person_id, generations = args
+    return render_chart(_worker_data, kind, person_id, generations)
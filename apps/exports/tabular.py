@@ -0,0 +1,146 @@
+"""
+Streaming CSV and JSON Lines export of a family's people and relationships.
+
+Rows come from values_list(...).iterator() (a server-side cursor read
+CHUNK_SIZE rows at a time) and are encoded a chunk at a time, so memory
+stays flat however large the family is. Output can be gzip-compressed on
+the fly.
+"""
+import csv
+import json
+import zlib
+from io import StringIO
+from itertools import islice
+
+from apps.persons.models import Person
+from apps.persons.search import filter_person_list
+from apps.relationships.models import Relationship
+
+CHUNK_SIZE = 5000
+
+PERSON_COLUMNS = [
+    "id", "first_name", "middle_name", "last_name", "gender",
+    "birth_date", "birth_place", "death_date", "death_place",
+    "is_living", "notes", "created_at", "updated_at",
+]
+
+RELATIONSHIP_COLUMNS = ["id", "person_id", "related_person_id", "relationship_type", "created_at"]
+
+DATASETS = {"persons": PERSON_COLUMNS, "relationships": RELATIONSHIP_COLUMNS}
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson; charset=utf-8",
+}
+
+
+def select_columns(dataset, requested=None):
+    """
+    Columns to export, in the order asked for. `requested` is a
+    comma-separated string; empty means every column. Raises ValueError
+    naming any column that does not exist.
+    """
+    allowed = DATASETS[dataset]
+    if not requested:
+        return list(allowed)
+    columns = [c.strip() for c in requested.split(",") if c.strip()]
+    unknown = [c for c in columns if c not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+    return list(dict.fromkeys(columns))
+
+
+def person_queryset(family_id, params):
+    return filter_person_list(Person.objects.filter(family_id=family_id), params)
+
+
+def relationship_queryset(family_id, params):
+    """
+    Relationships of a family, optionally narrowed by `type` and `person`.
+    Every edge is stored in both directions, so filtering on person_id
+    alone already finds all of a person's relationships.
+    """
+    queryset = Relationship.objects.filter(family_id=family_id)
+    rel_type = params.get("type")
+    if rel_type in dict(Relationship.REL_TYPES):
+        queryset = queryset.filter(relationship_type=rel_type)
+    person = params.get("person", "")
+    if person.isdigit():
+        queryset = queryset.filter(person_id=int(person))
+    return queryset
+
+
+QUERYSETS = {"persons": person_queryset, "relationships": relationship_queryset}
+
+# Filter parameters each dataset understands
+FILTERS = {"persons": ("q", "gender", "living"), "relationships": ("type", "person")}
+
+
+def _batches(rows):
+    while batch := list(islice(rows, CHUNK_SIZE)):
+        yield batch
+
+
+def csv_chunks(columns, rows):
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for batch in _batches(rows):
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Header only: the query returned nothing
+        yield buffer.getvalue()
+
+
+def _json_default(value):
+    # Dates and datetimes
+    return value.isoformat()
+
+
+def jsonl_chunks(columns, rows):
+    encode = json.JSONEncoder(ensure_ascii=False, default=_json_default).encode
+    for batch in _batches(rows):
+        yield "".join(encode(dict(zip(columns, row))) + "\n" for row in batch)
+
+
+ENCODERS = {"csv": csv_chunks, "jsonl": jsonl_chunks}
+
+
+def gzip_chunks(chunks, level=6):
+    """gzip-compress a stream of byte strings as it is produced."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _counted(rows, progress):
+    done = 0
+    for done, row in enumerate(rows, 1):
+        yield row
+        if done % CHUNK_SIZE == 0:
+            progress(done)
+    progress(done)
+
+
+def export_table(family_id, dataset, fmt, columns, params=None, compress=False, progress=None):
+    """
+    Yield the export as bytes. `columns` should come from
+    select_columns(); `params` are the dataset's filters (a dict or a
+    QueryDict). `progress(rows)` is called every CHUNK_SIZE rows.
+    """
+    queryset = QUERYSETS[dataset](family_id, params or {})
+    rows = queryset.order_by("id").values_list(*columns).iterator(chunk_size=CHUNK_SIZE)
+    if progress is not None:
+        rows = _counted(rows, progress)
+    chunks = (chunk.encode("utf-8") for chunk in ENCODERS[fmt](columns, rows))
+    return gzip_chunks(chunks) if compress else chunks
+
+
+def filename(family_id, dataset, fmt, compress=False):
+    return f"family-{family_id}-{dataset}.{fmt}" + (".gz" if compress else "")
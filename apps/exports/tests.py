@@ -1,3 +1,202 @@
-from django.test import TestCase
+import re
+import shutil
+import tempfile
+from collections import defaultdict
+from datetime import timedelta
+from io import BytesIO
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.families.models import Family
+from apps.persons.models import Person
+from apps.relationships.models import Relationship
+from .gedcom import MAX_VALUE, export_family, text_lines
+from .jobs import expire_artifacts, find_artifact, request_export, store_artifact
+from .models import ExportArtifact, ExportJob, options_key
+
+
+def parse_links(document):
+    """
+    Links as seen from both ends: {fam: {(role, person)}} from FAM records
+    and {(role, person, fam)} from INDI records; role is PARTNER or CHIL.
+    """
+    fams, links = defaultdict(set), set()
+    record = None
+    for line in document.splitlines():
+        match = re.match(r"0 (@\w+@) (\w+)", line)
+        if match:
+            record = match.groups()
+            if record[1] == "FAM":
+                fams.setdefault(record[0], set())
+            continue
+        match = re.match(r"1 (HUSB|WIFE|CHIL|FAMS|FAMC) (@\w+@)", line)
+        if match and record:
+            tag, xref = match.groups()
+            if record[1] == "FAM":
+                fams[record[0]].add(("CHIL" if tag == "CHIL" else "PARTNER", xref))
+            else:
+                links.add(("CHIL" if tag == "FAMC" else "PARTNER", record[0], xref))
+    return fams, links
+
+
+class GedcomLinkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user("owner", "owner@example.com", "password", first_name="Ann", last_name="Owner")
+        cls.family = Family.objects.create(name="Test", owner=owner)
+        people = {
+            name: Person.objects.create(family=cls.family, first_name=name, gender=gender)
+            for name, gender in [
+                ("Father", "male"), ("Mother", "female"), ("Step", "other"),
+                ("Child", "female"), ("Husband", "male"), ("Wife", "female"),
+            ]
+        }
+        cls.people = people
+        Relationship.objects.create(
+            family=cls.family, person=people["Father"], related_person=people["Mother"], relationship_type="spouse"
+        )
+        # bulk_create skips Relationship.save, so these rows have no reverse:
+        # a couple stored high id first, and a child with three parents
+        Relationship.objects.bulk_create([
+            Relationship(family=cls.family, person=people["Wife"], related_person=people["Husband"],
+                         relationship_type="spouse"),
+            *[
+                Relationship(family=cls.family, person=people["Child"], related_person=people[parent],
+                             relationship_type="child")
+                for parent in ("Father", "Mother", "Step")
+            ],
+        ])
+
+    def export(self):
+        return "".join(export_family(self.family))
+
+    def test_every_pointer_has_a_matching_record(self):
+        fams, links = parse_links(self.export())
+        listed = {(role, person, fam) for fam, members in fams.items() for role, person in members}
+        self.assertEqual(links, listed)
+
+    def test_couple_stored_one_way_gets_a_family(self):
+        fams, _ = parse_links(self.export())
+        husband, wife = self.people["Husband"].id, self.people["Wife"].id
+        self.assertEqual(
+            fams[f"@F{min(husband, wife)}S{max(husband, wife)}@"],
+            {("PARTNER", f"@I{husband}@"), ("PARTNER", f"@I{wife}@")},
+        )
+
+    def test_third_parent_is_left_out(self):
+        fams, links = parse_links(self.export())
+        child = f"@I{self.people['Child'].id}@"
+        families = [fam for fam, members in fams.items() if ("CHIL", child) in members]
+        self.assertEqual(len(families), 1)
+        self.assertEqual(len([m for m in fams[families[0]] if m[0] == "PARTNER"]), 2)
+        middle = sorted(self.people[name].id for name in ("Father", "Mother", "Step"))[1]
+        self.assertNotIn(("PARTNER", f"@I{middle}@", families[0]), links)
+
+    def test_header_points_to_submitter(self):
+        document = self.export()
+        self.assertIn("1 SUBM @SUBM@\n", document)
+        self.assertIn("0 @SUBM@ SUBM\n1 NAME Ann Owner\n", document)
+        self.assertTrue(document.endswith("0 TRLR\n"))
+
+
+class TextLinesTests(SimpleTestCase):
+    def join(self, lines):
+        """Reassemble a value the way a reader does: CONC joins, CONT starts a new line."""
+        text = ""
+        for line in lines:
+            level, tag, value = (line.split(" ", 2) + [""])[:3]
+            text += ("\n" if tag == "CONT" else "") + value
+        return text.replace("@@", "@")
+
+    def test_short_value(self):
+        self.assertEqual(list(text_lines(1, "NOTE", "Hello")), ["1 NOTE Hello"])
+
+    def test_new_lines_become_cont(self):
+        lines = list(text_lines(1, "NOTE", "one\ntwo"))
+        self.assertEqual(lines, ["1 NOTE one", "2 CONT two"])
+
+    def test_conc_split_never_beside_a_space(self):
+        text = "word " * 120 + "end"
+        lines = list(text_lines(1, "NOTE", text))
+        self.assertGreater(len(lines), 1)
+        for line in lines:
+            value = line.split(" ", 2)[2]
+            self.assertLessEqual(len(value), MAX_VALUE)
+            self.assertFalse(value.startswith(" ") or value.endswith(" "), line)
+        self.assertEqual(self.join(lines), text)
+
+    def test_escaped_at_signs_stay_together(self):
+        text = "x" * (MAX_VALUE - 1) + "@" + "y" * 10
+        lines = list(text_lines(1, "NOTE", text))
+        self.assertTrue(all("@@" in line or "@" not in line for line in lines))
+        self.assertEqual(self.join(lines), text)
+
+
+class ArtifactTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", "owner@example.com", "password")
+        cls.family = Family.objects.create(name="Test", owner=cls.owner)
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=media)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+        self.job = ExportJob.objects.create(family=self.family, requested_by=self.owner, kind="gedcom")
+        self.key = options_key("gedcom", self.job.build_options)
+
+    def store(self, content, data_version=1):
+        return store_artifact(self.job, self.key, data_version, "family.ged", BytesIO(content))
+
+    def test_same_build_is_stored_once(self):
+        first = self.store(b"first")
+        second = self.store(b"second")
+        self.assertEqual(second.pk, first.pk)
+        self.assertEqual(ExportArtifact.objects.count(), 1)
+        with second.file.open("rb") as fh:
+            self.assertEqual(fh.read(), b"first")
+        # The losing build's file is not left behind
+        self.assertEqual(len(first.file.storage.listdir(f"exports/{self.family.id}")[1]), 1)
+
+    def test_new_data_version_is_a_new_artifact(self):
+        first = self.store(b"v1", data_version=1)
+        second = self.store(b"v2", data_version=2)
+        self.assertNotEqual(first.pk, second.pk)
+
+    def test_expired_row_is_taken_over(self):
+        stale = self.store(b"old")
+        stale_name = stale.file.name
+        ExportArtifact.objects.filter(pk=stale.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        fresh = self.store(b"new")
+        self.assertEqual(fresh.pk, stale.pk)
+        self.assertGreater(fresh.expires_at, timezone.now())
+        self.assertNotEqual(fresh.file.name, stale_name)
+        self.assertFalse(fresh.file.storage.exists(stale_name))
+        with fresh.file.open("rb") as fh:
+            self.assertEqual(fh.read(), b"new")
+
+    def test_find_artifact_extends_live_ones_only(self):
+        artifact = self.store(b"data")
+        found = find_artifact(self.family.id, self.key, 1)
+        self.assertEqual(found.pk, artifact.pk)
+        self.assertIsNone(find_artifact(self.family.id, self.key, 2))
+
+        ExportArtifact.objects.filter(pk=artifact.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertIsNone(find_artifact(self.family.id, self.key, 1))
+        self.assertEqual(expire_artifacts(), 1)
+        self.assertFalse(artifact.file.storage.exists(artifact.file.name))
+
+    def test_request_export_reuses_a_current_artifact(self):
+        Family.objects.filter(pk=self.family.pk).update(data_version=1)
+        artifact = self.store(b"data")
+        job = request_export(self.family, self.owner, "gedcom")
+        self.assertEqual(job.status, "done")
+        self.assertEqual(job.artifact_id, artifact.pk)
+
+        Family.bump_data_version(self.family.pk)
+        self.assertEqual(request_export(self.family, self.owner, "gedcom").status, "pending")
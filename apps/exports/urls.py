@@ -1,10 +1,25 @@
 from django.urls import path
-from django.http import HttpResponse
 
-def export_pdf_list(request): return HttpResponse("Export PDF list")
+from .views import (
+    ExportJobDetailView,
+    ExportJobDownloadView,
+    ExportJobListView,
+    ExportJobStatusView,
+    ExportRequestView,
+    GedcomExportView,
+    GedcomImportView,
+    TableExportView,
+)
 
 app_name = 'exports'
 
 urlpatterns = [
-    path('', export_pdf_list, name='export_pdf_list'),
+    path('', ExportJobListView.as_view(), name='export_pdf_list'),
+    path('jobs/<int:pk>/', ExportJobDetailView.as_view(), name='job_detail'),
+    path('jobs/<int:pk>/status/', ExportJobStatusView.as_view(), name='job_status'),
+    path('jobs/<int:pk>/download/', ExportJobDownloadView.as_view(), name='job_download'),
+    path('<int:family_id>/request/', ExportRequestView.as_view(), name='request'),
+    path('<int:family_id>/gedcom/', GedcomExportView.as_view(), name='gedcom'),
+    path('<int:family_id>/data/<slug:dataset>.<slug:fmt>', TableExportView.as_view(), name='table'),
+    path('<int:family_id>/gedcom/import/', GedcomImportView.as_view(), name='gedcom_import'),
 ]
@@ -1,3 +1,206 @@
-from django.shortcuts import render
+from django.contrib import messages
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import FileResponse, Http404, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.views import View
+from django.views.generic import DetailView, ListView
 
-# Create your views here.
+from apps.families.models import Family
+from apps.persons.models import Person
+from . import jobs, tabular
+from .gedcom import export_family
+from .gedcom_import import import_gedcom
+from .models import ExportJob
+
+# Upper bound on people charted by one job
+MAX_REPORT_PEOPLE = 200
+
+
+class GedcomExportView(LoginRequiredMixin, View):
+    """Download a whole family as GEDCOM 5.5.1, streamed record by record."""
+
+    def get(self, request, family_id):
+        family = get_object_or_404(Family, id=family_id, memberships__user=request.user)
+        response = StreamingHttpResponse(
+            (record.encode("utf-8") for record in export_family(family)),
+            content_type="text/x-gedcom; charset=utf-8",
+        )
+        response["Content-Disposition"] = f'attachment; filename="family-{family.id}.ged"'
+        return response
+
+
+class TableExportView(LoginRequiredMixin, View):
+    """
+    Stream a family's people or relationships as CSV or JSON Lines.
+
+    Query parameters: `columns` (comma-separated, default all), `gzip=1`,
+    and the dataset's filters: q/gender/living as on the person list, or
+    type/person for relationships.
+    """
+
+    def get(self, request, family_id, dataset, fmt):
+        if dataset not in tabular.DATASETS or fmt not in tabular.FORMATS:
+            raise Http404("Unknown export.")
+        family = get_object_or_404(Family, id=family_id, memberships__user=request.user)
+        try:
+            columns = tabular.select_columns(dataset, request.GET.get("columns"))
+        except ValueError as exc:
+            return HttpResponseBadRequest(str(exc))
+
+        compress = request.GET.get("gzip") in ("1", "true", "yes")
+        response = StreamingHttpResponse(
+            tabular.export_table(family.id, dataset, fmt, columns, request.GET, compress),
+            content_type="application/gzip" if compress else tabular.FORMATS[fmt],
+        )
+        name = tabular.filename(family.id, dataset, fmt, compress)
+        response["Content-Disposition"] = f'attachment; filename="{name}"'
+        return response
+
+
+class GedcomImportView(LoginRequiredMixin, View):
+    """
+    Upload a GEDCOM file into a family (owners and admins). "Validate only"
+    parses the whole file and reports problems without writing anything.
+    """
+    template_name = "exports/gedcom_import.html"
+
+    def get_family(self, request, family_id):
+        return get_object_or_404(
+            Family, id=family_id, memberships__user=request.user, memberships__role__in=("owner", "admin")
+        )
+
+    def get(self, request, family_id):
+        return render(request, self.template_name, {"family": self.get_family(request, family_id)})
+
+    def post(self, request, family_id):
+        family = self.get_family(request, family_id)
+        upload = request.FILES.get("file")
+        if upload is None:
+            messages.error(request, "Choose a GEDCOM file to upload.")
+            return render(request, self.template_name, {"family": family})
+
+        def read_lines():
+            upload.seek(0)
+            yield from upload
+
+        dry_run = bool(request.POST.get("dry_run"))
+        result = import_gedcom(read_lines, family, user=request.user, dry_run=dry_run)
+        summary = f"{result.persons} people and {result.relationships // 2} relationships"
+        if dry_run:
+            messages.info(request, f"Validation found {summary}; nothing was imported.")
+        else:
+            messages.success(request, f"Imported {summary}.")
+        for error in result.errors[:20]:
+            messages.warning(request, error)
+        if dry_run:
+            return render(request, self.template_name, {"family": family, "result": result})
+        return redirect("families:detail", family.id)
+
+
+class ExportRequestView(LoginRequiredMixin, View):
+    """
+    Queue an export for the export worker. POST `kind`, plus:
+
+    - pedigree/descendants: one or more `person` ids and `generations`
+      (several people give a zip of charts);
+    - persons/relationships: `format` (csv/jsonl), `columns`, `gzip` and
+      the same filters as the streaming table export.
+
+    When the same export of the family's current data already exists the
+    job is done immediately.
+    """
+
+    def post(self, request, family_id):
+        family = get_object_or_404(Family, id=family_id, memberships__user=request.user)
+        kind = request.POST.get("kind")
+        if kind not in dict(ExportJob.KIND_CHOICES):
+            messages.error(request, "Unknown export type.")
+            return redirect("families:detail", family.id)
+
+        person_ids, generations, options = [], 4, {}
+        if kind in ("pedigree", "descendants"):
+            requested = {int(v) for v in request.POST.getlist("person") if v.isdigit()}
+            person_ids = sorted(
+                Person.objects.filter(family=family, id__in=requested).values_list("id", flat=True)
+            )[:MAX_REPORT_PEOPLE]
+            if not person_ids:
+                messages.error(request, "Choose at least one person from this family.")
+                return redirect("families:detail", family.id)
+            try:
+                generations = min(max(int(request.POST.get("generations", 4)), 1), 20)
+            except ValueError:
+                pass
+        elif kind in tabular.DATASETS:
+            try:
+                columns = tabular.select_columns(kind, request.POST.get("columns"))
+            except ValueError as exc:
+                messages.error(request, str(exc))
+                return redirect("families:detail", family.id)
+            fmt = request.POST.get("format")
+            options = {
+                "format": fmt if fmt in tabular.FORMATS else "csv",
+                "columns": columns,
+                "gzip": request.POST.get("gzip") in ("1", "true", "yes"),
+                "filters": {
+                    name: request.POST[name] for name in tabular.FILTERS[kind] if request.POST.get(name)
+                },
+            }
+
+        job = jobs.request_export(family, request.user, kind, person_ids, generations, options)
+        if job.status == "done":
+            messages.success(request, "This export is ready.")
+        else:
+            messages.info(request, "Your export is being prepared.")
+        return redirect("exports:job_detail", job.pk)
+
+
+class ExportJobListView(LoginRequiredMixin, ListView):
+    """The current user's export jobs, newest first."""
+    template_name = "exports/job_list.html"
+    context_object_name = "jobs"
+    paginate_by = 25
+
+    def get_queryset(self):
+        return (
+            ExportJob.objects.filter(requested_by=self.request.user).select_related("family", "artifact")
+        )
+
+
+class ExportJobDetailView(LoginRequiredMixin, DetailView):
+    """Status page for one job; reloads itself until the job finishes."""
+    template_name = "exports/job_detail.html"
+    context_object_name = "job"
+
+    def get_queryset(self):
+        return (
+            ExportJob.objects.filter(family__memberships__user=self.request.user)
+            .select_related("family", "artifact")
+        )
+
+
+class ExportJobStatusView(ExportJobDetailView):
+    """The job's status and progress as JSON, for polling."""
+
+    def render_to_response(self, context, **response_kwargs):
+        job = self.object
+        return JsonResponse({
+            "id": job.pk,
+            "status": job.status,
+            "progress": job.progress,
+            "total": job.total,
+            "percent": job.percent,
+            "error": job.error,
+            "download_url": reverse("exports:job_download", args=[job.pk]) if job.ready else None,
+        })
+
+
+class ExportJobDownloadView(LoginRequiredMixin, View):
+    def get(self, request, pk):
+        job = get_object_or_404(
+            ExportJob.objects.select_related("artifact"), pk=pk, family__memberships__user=request.user
+        )
+        if not job.ready:
+            raise Http404("This export is not ready or has expired.")
+        artifact = job.artifact
+        return FileResponse(artifact.file.open("rb"), as_attachment=True, filename=artifact.filename)
@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 14:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('families', '0004_remove_joinrequest_approved_joinrequest_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='family',
+            name='data_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import F
 from django.conf import settings
 from django.utils import timezone
 import uuid
@@ -15,12 +16,18 @@ class Family(models.Model):
     owner = models.ForeignKey(User, related_name='owned_families', on_delete=models.CASCADE)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
+    # Bumped on every Person/Relationship write; used to key caches of derived data
+    data_version = models.PositiveIntegerField(default=0)
 
     def save(self, *args, **kwargs):
         if not self.code:
             self.code = generate_family_code()
         super().save(*args, **kwargs)
 
+    @classmethod
+    def bump_data_version(cls, family_id):
+        cls.objects.filter(pk=family_id).update(data_version=F("data_version") + 1)
+
 
 class FamilyMembership(models.Model):
     ROLE_CHOICES = (
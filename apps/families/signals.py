@@ -1,9 +1,11 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.template.loader import render_to_string
 from django.core.mail import send_mail
 from django.conf import settings
-from .models import JoinRequest, Invitation
+from apps.persons.models import Person
+from apps.relationships.models import Relationship
+from .models import Family, JoinRequest, Invitation
 
 @receiver(post_save, sender=JoinRequest)
 def notify_admins_on_join_request(sender, instance, created, **kwargs):
@@ -46,3 +48,15 @@ def notify_invited_user(sender, instance, created, **kwargs):
         send_mail(subject, text, settings.DEFAULT_FROM_EMAIL, [instance.email], html_message=html, fail_silently=True)
     except Exception:
         pass
+
+
+@receiver(post_save, sender=Person)
+@receiver(post_delete, sender=Person)
+@receiver(post_save, sender=Relationship)
+@receiver(post_delete, sender=Relationship)
+def bump_family_data_version(sender, instance, **kwargs):
+    """
+    Any change to a family's people or relationships invalidates the caches
+    keyed by Family.data_version (tree JSON, search results, exports).
+    """
+    Family.bump_data_version(instance.family_id)
@@ -1,3 +1,31 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 
-# Register your models here.
+from .dedup import merge_persons
+from .models import DuplicateCandidate
+
+
+@admin.register(DuplicateCandidate)
+class DuplicateCandidateAdmin(admin.ModelAdmin):
+    list_display = ("person_a", "person_b", "score", "reasons", "status", "family", "created_at")
+    list_filter = ("status", "family")
+    list_select_related = ("person_a", "person_b", "family")
+    raw_id_fields = ("person_a", "person_b", "family")
+    actions = ["merge_into_first", "dismiss"]
+
+    @admin.action(description="Merge the second person into the first")
+    def merge_into_first(self, request, queryset):
+        merged = 0
+        for pk in list(queryset.filter(status="pending").values_list("pk", flat=True)):
+            # Re-read each row: an earlier merge in this batch may have
+            # changed the kept person or deleted this candidate outright
+            candidate = DuplicateCandidate.objects.select_related("person_a", "person_b").filter(pk=pk).first()
+            if candidate is None:
+                continue
+            merge_persons(candidate.person_a, candidate.person_b)
+            merged += 1
+        self.message_user(request, f"Merged {merged} duplicate(s).", messages.SUCCESS)
+
+    @admin.action(description="Mark as not duplicates")
+    def dismiss(self, request, queryset):
+        updated = queryset.filter(status="pending").update(status="dismissed")
+        self.message_user(request, f"Dismissed {updated} candidate(s).", messages.SUCCESS)
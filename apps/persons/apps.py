@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PersonsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.persons'
+
+    def ready(self):
+        # keep the stored search columns current
+        import apps.persons.signals  # noqa: F401
@@ -0,0 +1,228 @@
+"""
+Find and merge duplicate Person records within a family.
+
+Comparing every pair is quadratic, so people are first grouped into
+blocks that any real duplicate pair is likely to share: the phonetic
+surname code, the birth decade (with the first-name code), and each
+parent. Only pairs inside a block are scored.
+"""
+from collections import defaultdict
+from difflib import SequenceMatcher
+from itertools import combinations
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from apps.families.models import Family
+from apps.relationships import closure
+from apps.relationships.models import Relationship
+from apps.search.autocomplete import normalize
+from apps.search.graph import invalidate_family_graph
+from .models import DuplicateCandidate, Person
+
+# A block this large is a common surname or decade, not evidence of a
+# duplicate; its members still meet in their other, smaller blocks.
+MAX_BLOCK_SIZE = 400
+
+DEFAULT_THRESHOLD = 0.7
+
+FIELDS = [
+    "id", "gender", "first_name", "last_name", "first_name_dm", "last_name_dm",
+    "last_name_dm_alt", "birth_date", "death_date", "birth_place",
+]
+
+# Empty fields a merge copies from the duplicate onto the kept record
+MERGE_FIELDS = ["middle_name", "birth_date", "birth_place", "death_date", "death_place", "photo"]
+
+
+def _parents(family_id):
+    parents = defaultdict(set)
+    rows = Relationship.objects.filter(
+        family_id=family_id, relationship_type="child"
+    ).values_list("person_id", "related_person_id")
+    for child_id, parent_id in rows.iterator(chunk_size=5000):
+        parents[child_id].add(parent_id)
+    return parents
+
+
+def blocking_keys(row, parents):
+    keys = set()
+    for code in (row["last_name_dm"], row["last_name_dm_alt"]):
+        if code:
+            keys.add(("surname", code))
+    if row["birth_date"]:
+        keys.add(("decade", row["birth_date"].year // 10, row["first_name_dm"] or ""))
+    for parent_id in parents.get(row["id"], ()):
+        keys.add(("parent", parent_id))
+    return keys
+
+
+def candidate_pairs(rows, parents):
+    """Yield each (lower id, higher id) pair that shares at least one block, once."""
+    blocks = defaultdict(list)
+    for row in rows:
+        for key in blocking_keys(row, parents):
+            blocks[key].append(row["id"])
+
+    seen = set()
+    for members in blocks.values():
+        if len(members) < 2 or len(members) > MAX_BLOCK_SIZE:
+            continue
+        for a, b in combinations(sorted(members), 2):
+            if (a, b) not in seen:
+                seen.add((a, b))
+                yield a, b
+
+
+def _similarity(a, b):
+    a, b = normalize(a), normalize(b)
+    if not a or not b:
+        return 0.0
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def _date_score(a, b):
+    """1 same day, 0.7 same year, 0.4 within two years, -1 conflicting, 0 unknown."""
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    years = abs(a.year - b.year)
+    if years == 0:
+        return 0.7
+    if years <= 2:
+        return 0.4
+    return -1.0
+
+
+def score_pair(a, b, shared_parent=False):
+    """
+    Score two person rows from 0 (different people) to 1 (certainly the
+    same). Returns (score, [reasons]).
+    """
+    if a["gender"] != b["gender"] and "other" not in (a["gender"], b["gender"]):
+        return 0.0, []
+
+    reasons = []
+    first = _similarity(a["first_name"], b["first_name"])
+    last = _similarity(a["last_name"], b["last_name"])
+    birth = _date_score(a["birth_date"], b["birth_date"])
+    death = _date_score(a["death_date"], b["death_date"])
+    place = _similarity(a["birth_place"], b["birth_place"])
+
+    score = 0.3 * first + 0.3 * last + 0.25 * birth + 0.05 * death + 0.05 * place
+    if shared_parent:
+        score += 0.05
+        reasons.append("same parent")
+
+    if first >= 0.85:
+        reasons.append("first name")
+    if last >= 0.85:
+        reasons.append("last name")
+    elif a["last_name_dm"] and a["last_name_dm"] in (b["last_name_dm"], b["last_name_dm_alt"]):
+        reasons.append("surname sounds alike")
+    if birth == 1.0:
+        reasons.append("birth date")
+    elif birth > 0:
+        reasons.append("birth year")
+    elif birth < 0:
+        reasons.append("birth dates conflict")
+    if death > 0:
+        reasons.append("death date")
+    if place >= 0.85:
+        reasons.append("birth place")
+
+    return round(min(max(score, 0.0), 1.0), 3), reasons
+
+
+def find_duplicates(family_id, threshold=DEFAULT_THRESHOLD):
+    """Return [(person_a id, person_b id, score, reasons)] for a family, best first."""
+    rows = {
+        row["id"]: row
+        for row in Person.objects.filter(family_id=family_id).values(*FIELDS).iterator(chunk_size=5000)
+    }
+    parents = _parents(family_id)
+
+    results = []
+    for a, b in candidate_pairs(rows.values(), parents):
+        shared = bool(parents.get(a, set()) & parents.get(b, set()))
+        score, reasons = score_pair(rows[a], rows[b], shared)
+        if score >= threshold:
+            results.append((a, b, score, reasons))
+    results.sort(key=lambda r: (-r[2], r[0], r[1]))
+    return results
+
+
+def record_candidates(family_id, threshold=DEFAULT_THRESHOLD):
+    """
+    Replace the family's pending candidates with a fresh scan.
+    Pairs an admin already dismissed are left alone and not re-suggested.
+    """
+    found = find_duplicates(family_id, threshold)
+    with transaction.atomic():
+        DuplicateCandidate.objects.filter(family_id=family_id, status="pending").delete()
+        DuplicateCandidate.objects.bulk_create(
+            [
+                DuplicateCandidate(
+                    family_id=family_id, person_a_id=a, person_b_id=b, score=score, reasons=reasons
+                )
+                for a, b, score, reasons in found
+            ],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+    return len(found)
+
+
+def _repoint(duplicate, keep, field, other):
+    """
+    Move every Relationship whose `field` is `duplicate` over to `keep`.
+    Rows that would collide with an edge `keep` already has (the unique
+    person/related_person/type triple), or would link `keep` to itself,
+    are deleted first.
+    """
+    rows = Relationship.objects.filter(**{field: duplicate})
+    existing = Relationship.objects.filter(
+        **{field: keep, other: OuterRef(other), "relationship_type": OuterRef("relationship_type")}
+    )
+    rows.filter(**{other: keep}).delete()
+    rows.filter(Exists(existing)).delete()
+    return rows.update(**{field: keep})
+
+
+def merge_persons(keep, duplicate):
+    """
+    Fold `duplicate` into `keep` and delete it.
+
+    Blank fields on `keep` are filled from `duplicate`, then both
+    directions of every Relationship are re-pointed in bulk. Bulk updates
+    bypass the per-row signals, and the closure signals are suspended for
+    the colliding rows that are deleted, so the family's ancestry
+    closure, data version and cached graph are refreshed once at the end.
+    """
+    if keep.pk == duplicate.pk:
+        raise ValueError("Cannot merge a person into themselves.")
+    if keep.family_id != duplicate.family_id:
+        raise ValueError("Both persons must belong to the same family.")
+
+    family_id = keep.family_id
+    with transaction.atomic():
+        for field in MERGE_FIELDS:
+            if not getattr(keep, field) and getattr(duplicate, field):
+                setattr(keep, field, getattr(duplicate, field))
+        if keep.death_date:
+            keep.is_living = False
+        if duplicate.notes and duplicate.notes not in keep.notes:
+            keep.notes = "\n\n".join(filter(None, [keep.notes, duplicate.notes]))
+        keep.save()
+
+        with closure.suspended():
+            _repoint(duplicate, keep, "person", "related_person")
+            _repoint(duplicate, keep, "related_person", "person")
+            # Candidate rows naming the duplicate go with it (on_delete=CASCADE)
+            duplicate.delete()
+
+        closure.rebuild_family(family_id)
+        Family.bump_data_version(family_id)
+        transaction.on_commit(lambda: invalidate_family_graph(family_id))
+    return keep
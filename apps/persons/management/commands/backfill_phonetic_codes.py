@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from apps.families.models import Family
+from apps.persons.models import Person
+from apps.persons.search import PHONETIC_CODES
+
+
+class Command(BaseCommand):
+    help = "Fill the Double Metaphone name codes on Person, a chunk of families at a time."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--families-per-batch", type=int, default=50)
+        parser.add_argument("--family", type=int, help="Only process this family.")
+        parser.add_argument("--missing-only", action="store_true", help="Skip rows that already have codes.")
+
+    def handle(self, *args, **options):
+        family_ids = Family.objects.order_by("id").values_list("id", flat=True)
+        if options["family"]:
+            family_ids = family_ids.filter(id=options["family"])
+        family_ids = list(family_ids)
+
+        qs = Person.objects.all()
+        if options["missing_only"]:
+            qs = qs.filter(last_name_dm__isnull=True)
+
+        # One UPDATE per chunk of families keeps each transaction short and
+        # lets the (family, ...) indexes narrow the rows touched.
+        batch = options["families_per_batch"]
+        updated = 0
+        for start in range(0, len(family_ids), batch):
+            chunk = family_ids[start:start + batch]
+            updated += qs.filter(family_id__in=chunk).update(**PHONETIC_CODES)
+            self.stdout.write(f"Updated {updated} people ({start + len(chunk)}/{len(family_ids)} families)")
+
+        self.stdout.write(self.style.SUCCESS(f"Done: {updated} people updated."))
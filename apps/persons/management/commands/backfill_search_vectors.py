@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+
+from apps.persons.models import Person
+from apps.persons.search import PERSON_SEARCH_VECTOR
+
+
+class Command(BaseCommand):
+    help = "Fill Person.search_vector for existing rows in id-range batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--family", type=int, help="Only process this family.")
+        parser.add_argument("--missing-only", action="store_true", help="Skip rows that already have a vector.")
+
+    def handle(self, *args, **options):
+        qs = Person.objects.all()
+        if options["family"]:
+            qs = qs.filter(family_id=options["family"])
+        if options["missing_only"]:
+            qs = qs.filter(search_vector__isnull=True)
+
+        bounds = qs.aggregate(low=Min("id"), high=Max("id"))
+        if bounds["low"] is None:
+            self.stdout.write("Nothing to update.")
+            return
+
+        # Walk the primary key in fixed ranges so every UPDATE is short and
+        # the table is never locked for the whole backfill.
+        batch = options["batch_size"]
+        updated = 0
+        for start in range(bounds["low"], bounds["high"] + 1, batch):
+            updated += qs.filter(id__gte=start, id__lt=start + batch).update(
+                search_vector=PERSON_SEARCH_VECTOR
+            )
+            self.stdout.write(f"Updated {updated} people (ids < {start + batch})")
+
+        self.stdout.write(self.style.SUCCESS(f"Done: {updated} people updated."))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.families.models import Family
+from apps.persons.dedup import DEFAULT_THRESHOLD, find_duplicates, record_candidates
+
+
+class Command(BaseCommand):
+    help = "Scan families for likely duplicate people and record them for admin review."
+
+    def add_arguments(self, parser):
+        parser.add_argument("family_ids", nargs="*", type=int)
+        parser.add_argument("--all", action="store_true", help="Process every family.")
+        parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+        parser.add_argument("--dry-run", action="store_true", help="Print the pairs without saving them.")
+
+    def handle(self, *args, **options):
+        if options["all"]:
+            family_ids = list(Family.objects.values_list("id", flat=True))
+        else:
+            family_ids = options["family_ids"]
+        if not family_ids:
+            raise CommandError("Pass one or more family ids, or --all.")
+
+        for family_id in family_ids:
+            if options["dry_run"]:
+                found = find_duplicates(family_id, options["threshold"])
+                for a, b, score, reasons in found:
+                    self.stdout.write(f"{a}\t{b}\t{score:.3f}\t{', '.join(reasons)}")
+                count = len(found)
+            else:
+                count = record_candidates(family_id, options["threshold"])
+            self.stdout.write(self.style.SUCCESS(f"Family {family_id}: {count} candidate pair(s)"))
@@ -0,0 +1,21 @@
+# Generated by Django 5.0 on 2026-10-18 14:53
+
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('families', '0005_family_data_version'),
+        ('persons', '0003_person_person_name_gin'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='person',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['middle_name'], name='person_middle_name_gin', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0 on 2026-10-18 14:53
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+# Same vector as persons.search.PERSON_SEARCH_VECTOR; filled before the
+# index is built. backfill_search_vectors redoes it in batches if needed.
+BACKFILL_SQL = """
+UPDATE persons_person
+SET search_vector =
+    setweight(to_tsvector('simple', concat_ws(' ', first_name, middle_name, last_name)), 'A')
+    || setweight(to_tsvector('simple', concat_ws(' ', birth_place, death_place)), 'B')
+    || setweight(to_tsvector('simple', coalesce(notes, '')), 'C')
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('families', '0005_family_data_version'),
+        ('persons', '0004_person_middle_name_gin'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='person',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, reverse_sql=migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='person',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='person_search_vector_gin'),
+        ),
+    ]
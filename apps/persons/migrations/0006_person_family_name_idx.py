@@ -0,0 +1,20 @@
+# Generated by Django 5.0 on 2026-10-18 14:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('families', '0005_family_data_version'),
+        ('persons', '0005_person_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['family', 'last_name', 'first_name', 'id'], name='person_family_name_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0 on 2026-10-18 14:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('families', '0005_family_data_version'),
+        ('persons', '0006_person_family_name_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['family', 'gender'], name='person_family_gender_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['family', 'is_living'], name='person_family_living_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['family', 'birth_date'], name='person_family_birth_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.0 on 2026-10-18 14:57
+
+from django.conf import settings
+from django.contrib.postgres.operations import CreateExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('families', '0005_family_data_version'),
+        ('persons', '0007_person_facet_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        CreateExtension('fuzzystrmatch'),
+        migrations.AddField(
+            model_name='person',
+            name='first_name_dm',
+            field=models.CharField(editable=False, max_length=8, null=True),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='first_name_dm_alt',
+            field=models.CharField(editable=False, max_length=8, null=True),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='last_name_dm',
+            field=models.CharField(editable=False, max_length=8, null=True),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='last_name_dm_alt',
+            field=models.CharField(editable=False, max_length=8, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['family', 'first_name_dm'], name='person_first_dm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['family', 'first_name_dm_alt'], name='person_first_dm_alt_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['family', 'last_name_dm'], name='person_last_dm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['family', 'last_name_dm_alt'], name='person_last_dm_alt_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0 on 2026-10-18 14:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('families', '0005_family_data_version'),
+        ('persons', '0008_person_phonetic_codes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DuplicateCandidate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('reasons', models.JSONField(blank=True, default=list)),
+                ('status', models.CharField(choices=[('pending', 'Pending review'), ('merged', 'Merged'), ('dismissed', 'Not a duplicate')], default='pending', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('family', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='duplicate_candidates', to='families.family')),
+                ('person_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='persons.person')),
+                ('person_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='persons.person')),
+            ],
+            options={
+                'ordering': ['-score', 'id'],
+                'indexes': [models.Index(fields=['family', 'status', '-score'], name='dupcand_family_status_idx')],
+                'unique_together': {('person_a', 'person_b')},
+            },
+        ),
+    ]
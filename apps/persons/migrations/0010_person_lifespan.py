@@ -0,0 +1,37 @@
+# Generated by Django 5.0 on 2026-10-18 15:02
+
+import django.contrib.postgres.fields.ranges
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.db import migrations
+
+# Same rule as persons.models.LIFESPAN; filled before the index is built
+BACKFILL_SQL = """
+UPDATE persons_person
+SET lifespan = CASE
+    WHEN birth_date IS NULL AND (death_date IS NULL OR is_living) THEN NULL
+    WHEN NOT is_living AND death_date < birth_date THEN NULL
+    ELSE daterange(birth_date, CASE WHEN is_living THEN NULL ELSE death_date END, '[]')
+END
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('families', '0005_family_data_version'),
+        ('persons', '0009_duplicatecandidate'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='person',
+            name='lifespan',
+            field=django.contrib.postgres.fields.ranges.DateRangeField(editable=False, null=True),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, reverse_sql=migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='person',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['lifespan'], name='person_lifespan_gist'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 15:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('persons', '0010_person_lifespan'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='duplicatecandidate',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending review'), ('dismissed', 'Not a duplicate')], default='pending', max_length=10),
+        ),
+    ]
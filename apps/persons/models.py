@@ -2,8 +2,12 @@ from django.db import models
 from apps.accounts.models import User
 from apps.families.models import Family
 from django.utils import timezone
-from django.contrib.postgres.indexes import GinIndex
-from django.contrib.postgres.search import TrigramSimilarity
+from django.contrib.postgres.fields import DateRangeField
+from django.db.backends.postgresql.psycopg_any import DateRange
+from django.contrib.postgres.indexes import GinIndex, GistIndex
+from django.contrib.postgres.search import TrigramSimilarity, SearchVectorField
+from django.db.models import Case, F, Func, IntegerField, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
 
 import os
 
@@ -12,6 +16,63 @@ def person_photo_path(instance, filename):
     return os.path.join("persons", str(family_id), filename)
 
 
+class CurrentDate(Func):
+    template = "CURRENT_DATE"
+    output_field = models.DateField()
+
+
+class DateRangeFunc(Func):
+    function = "daterange"
+    output_field = DateRangeField()
+
+
+# [birth, death] with an open upper end while the person is living (or
+# the death date is unknown); NULL when neither date is known or the
+# dates are inverted (daterange() would raise)
+LIFESPAN = Case(
+    When(Q(birth_date__isnull=True) & (Q(death_date__isnull=True) | Q(is_living=True)), then=None),
+    When(is_living=False, death_date__lt=F("birth_date"), then=None),
+    default=DateRangeFunc(
+        "birth_date",
+        Case(When(is_living=True, then=None), default=F("death_date")),
+        Value("[]"),
+    ),
+    output_field=DateRangeField(),
+)
+
+
+class Age(Func):
+    """Whole years from birth to death (or today), as Person.age computes it."""
+    template = "EXTRACT(YEAR FROM AGE(%(expressions)s))::integer"
+    output_field = IntegerField()
+
+    def __init__(self, **extra):
+        super().__init__(Coalesce("death_date", CurrentDate()), "birth_date", **extra)
+
+
+class PersonQuerySet(models.QuerySet):
+    def with_age(self):
+        """Annotate `age_years` (NULL without a birth date) so lists can filter/sort by age in SQL."""
+        return self.annotate(age_years=Age())
+
+    def alive_during(self, start, end=None):
+        """People whose lifespan overlaps [start, end] (a single day if end is omitted)."""
+        return self.filter(lifespan__overlap=DateRange(start, end or start, "[]"))
+
+    def alive_throughout(self, start, end):
+        """People whose lifespan contains the whole of [start, end]."""
+        return self.filter(lifespan__contains=DateRange(start, end, "[]"))
+
+    def contemporaries_of(self, person_id, within=None):
+        """
+        Other people whose lifespan overlaps that of person `person_id`,
+        looked up in `within` (e.g. one family's people) as a subquery.
+        """
+        others = within if within is not None else self.model.objects.all()
+        lifespan = others.filter(pk=person_id).values("lifespan")[:1]
+        return self.filter(lifespan__overlap=Subquery(lifespan)).exclude(pk=person_id)
+
+
 class Person(models.Model):
     GENDER_CHOICES = [
         ('male', 'Male'),
@@ -47,6 +108,21 @@ class Person(models.Model):
 
     notes = models.TextField(blank=True)
 
+    # Weighted tsvector over names, places and notes; kept current by the
+    # post_save handler in signals.py (see search.py for the weights)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # Double Metaphone codes (primary and alternate) from Postgres'
+    # fuzzystrmatch, filled in by the same post_save update
+    first_name_dm = models.CharField(max_length=8, null=True, editable=False)
+    first_name_dm_alt = models.CharField(max_length=8, null=True, editable=False)
+    last_name_dm = models.CharField(max_length=8, null=True, editable=False)
+    last_name_dm_alt = models.CharField(max_length=8, null=True, editable=False)
+
+    # daterange of the person's life (see LIFESPAN); GiST-indexed for
+    # "alive in year X" and overlapping-lifetime queries
+    lifespan = DateRangeField(null=True, editable=False)
+
     created_by = models.ForeignKey(
         User,
         on_delete=models.SET_NULL,
@@ -57,12 +133,32 @@ class Person(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = PersonQuerySet.as_manager()
+
     class Meta:
         ordering = ['first_name', 'last_name']
         indexes = [
             GinIndex(fields=["first_name", "last_name"],
                      name='person_name_gin',
             opclasses=['gin_trgm_ops','gin_trgm_ops'],), 
+            # lets fuzzy search match middle names without a sequential scan
+            GinIndex(fields=["middle_name"],
+                     name='person_middle_name_gin',
+                     opclasses=['gin_trgm_ops'],),
+            GinIndex(fields=["search_vector"], name='person_search_vector_gin'),
+            # matches the keyset pagination order of person lists
+            models.Index(fields=["family", "last_name", "first_name", "id"],
+                         name='person_family_name_idx'),
+            # facet filters and counts on the filter page
+            models.Index(fields=["family", "gender"], name='person_family_gender_idx'),
+            models.Index(fields=["family", "is_living"], name='person_family_living_idx'),
+            models.Index(fields=["family", "birth_date"], name='person_family_birth_idx'),
+            # "sounds like" search looks up each code within a family
+            models.Index(fields=["family", "first_name_dm"], name='person_first_dm_idx'),
+            models.Index(fields=["family", "first_name_dm_alt"], name='person_first_dm_alt_idx'),
+            models.Index(fields=["family", "last_name_dm"], name='person_last_dm_idx'),
+            models.Index(fields=["family", "last_name_dm_alt"], name='person_last_dm_alt_idx'),
+            GistIndex(fields=["lifespan"], name='person_lifespan_gist'),
         ]
 
     def __str__(self):
@@ -83,3 +179,33 @@ class Person(models.Model):
             age -= 1
 
         return age
+
+
+class DuplicateCandidate(models.Model):
+    """
+    A pair of people in one family that the dedup engine thinks are the
+    same. Merging deletes person_b, and the candidate with it.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending review'),
+        ('dismissed', 'Not a duplicate'),
+    ]
+
+    family = models.ForeignKey(Family, on_delete=models.CASCADE, related_name='duplicate_candidates')
+    # person_a always has the lower id; it is the record kept on merge
+    person_a = models.ForeignKey(Person, on_delete=models.CASCADE, related_name='+')
+    person_b = models.ForeignKey(Person, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    reasons = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-score', 'id']
+        unique_together = ('person_a', 'person_b')
+        indexes = [
+            models.Index(fields=["family", "status", "-score"], name='dupcand_family_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.person_a} / {self.person_b} ({self.score:.2f})"
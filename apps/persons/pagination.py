@@ -0,0 +1,180 @@
+import base64
+import json
+
+from django.db import connections
+from django.db.models import Q
+
+
+def encode_cursor(values):
+    """Opaque, URL-safe token for the sort key of the last row on a page."""
+    raw = json.dumps(list(values), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Return the list of values in `token`, or None if it is malformed."""
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def keyset_filter(fields, values):
+    """
+    Build the "rows after `values`" condition for an ordering over `fields`.
+    Fields prefixed with "-" sort descending, e.g. ["-score", "id"] gives
+    score < s OR (score = s AND id > i).
+    """
+    condition = Q()
+    equal = {}
+    for field, value in zip(fields, values):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        condition |= Q(**equal, **{f"{name}__{lookup}": value})
+        equal[name] = value
+
+    # Redundant bound on the leading column so the planner can start an
+    # index range scan at the cursor instead of filtering every row.
+    first = fields[0]
+    bound = "lte" if first.startswith("-") else "gte"
+    return Q(**{f"{first.lstrip('-')}__{bound}": values[0]}) & condition
+
+
+def _flip(field):
+    return field[1:] if field.startswith("-") else f"-{field}"
+
+
+def estimated_count(queryset):
+    """
+    Planner row estimate for `queryset` (EXPLAIN, no scan). Good enough
+    for "about N results" without counting every matching row.
+    """
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]["Plan Rows"]
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = None
+        self.count_is_estimate = False
+        self.next_query = self.previous_query = None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Seek pagination: each page is "the next `per_page` rows after the last
+    key seen", so page 1000 costs the same as page 1. `ordering` must end in
+    a unique, non-null column (normally "id") and should match an index.
+    Cursor tokens carry a direction ("n"/"p") plus the boundary key.
+    `total` is set by subclasses that learn the exact row count for free.
+    """
+
+    total = None
+
+    def __init__(self, queryset, ordering=("last_name", "first_name", "id"), per_page=50):
+        self.queryset = queryset
+        self.ordering = list(ordering)
+        self.per_page = per_page
+
+    def _key(self, obj):
+        return [getattr(obj, field.lstrip("-")) for field in self.ordering]
+
+    def parse_token(self, token):
+        """Return (direction, boundary key or None) for a cursor token."""
+        values = decode_cursor(token)
+        if values and len(values) == len(self.ordering) + 1 and values[0] in ("n", "p"):
+            return values[0], values[1:]
+        return "n", None
+
+    def page(self, token=None):
+        direction, key = self.parse_token(token)
+
+        ordering = self.ordering if direction == "n" else [_flip(f) for f in self.ordering]
+        qs = self.queryset.order_by(*ordering)
+        if key is not None:
+            qs = qs.filter(keyset_filter(ordering, key))
+
+        rows = list(qs[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == "p":
+            rows.reverse()
+
+        if not rows:
+            return KeysetPage(rows, None, None)
+        # Going forwards there is a previous page whenever we started from a
+        # cursor; going backwards there is always a next page.
+        more_after = has_more if direction == "n" else True
+        more_before = key is not None if direction == "n" else has_more
+        return KeysetPage(
+            rows,
+            encode_cursor(["n", *self._key(rows[-1])]) if more_after else None,
+            encode_cursor(["p", *self._key(rows[0])]) if more_before else None,
+        )
+
+
+def paginate_keyset(request, queryset, ordering=("last_name", "first_name", "id"), per_page=50, paginator=None):
+    """
+    Paginate `queryset` from request.GET["cursor"]. Totals are estimated
+    by the planner unless the client asks for ?count=1 (or the paginator
+    already knows them).
+    """
+    paginator = paginator or KeysetPaginator(queryset, ordering, per_page)
+    page = paginator.page(request.GET.get("cursor"))
+    if paginator.total is not None:
+        page.count = paginator.total
+    elif request.GET.get("count") == "1":
+        page.count = queryset.count()
+    else:
+        page.count = estimated_count(queryset)
+        page.count_is_estimate = True
+
+    params = request.GET.copy()
+    params.pop("count", None)
+    for attr, cursor in (("next_query", page.next_cursor), ("previous_query", page.previous_cursor)):
+        if cursor:
+            params["cursor"] = cursor
+            setattr(page, attr, params.urlencode())
+    return page
+
+
+class KeysetPaginationMixin:
+    """Swap ListView's OFFSET pagination for paginate_keyset()."""
+
+    keyset_ordering = ("last_name", "first_name", "id")
+
+    def get_keyset_paginator(self, queryset, page_size):
+        """Override to supply a different KeysetPaginator (None = the default)."""
+        return None
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = self.get_keyset_paginator(queryset, page_size)
+        page = paginate_keyset(self.request, queryset, self.keyset_ordering, page_size, paginator)
+        return None, page, page.object_list, page.has_other_pages()
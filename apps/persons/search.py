@@ -0,0 +1,83 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db.models import CharField, Func, Q
+
+# Names and places are not English words, so no stemming: 'simple' config
+SEARCH_CONFIG = "simple"
+
+# A = names, B = places, C = notes
+PERSON_SEARCH_VECTOR = (
+    SearchVector("first_name", "middle_name", "last_name", weight="A", config=SEARCH_CONFIG)
+    + SearchVector("birth_place", "death_place", weight="B", config=SEARCH_CONFIG)
+    + SearchVector("notes", weight="C", config=SEARCH_CONFIG)
+)
+
+
+class DMetaphone(Func):
+    """Primary Double Metaphone code (needs the fuzzystrmatch extension)."""
+    function = "dmetaphone"
+    output_field = CharField()
+
+
+class DMetaphoneAlt(Func):
+    """Alternate Double Metaphone code; equal to the primary for most names."""
+    function = "dmetaphone_alt"
+    output_field = CharField()
+
+
+PHONETIC_CODES = {
+    "first_name_dm": DMetaphone("first_name"),
+    "first_name_dm_alt": DMetaphoneAlt("first_name"),
+    "last_name_dm": DMetaphone("last_name"),
+    "last_name_dm_alt": DMetaphoneAlt("last_name"),
+}
+
+
+def build_search_query(text):
+    """
+    Turn user input into a tsquery.
+
+    Input containing double quotes is parsed as a web search, so
+    "john smith" matches the phrase. Otherwise every word is
+    prefix-matched ("smi jo" -> smi:* & jo:*), which suits type-ahead.
+    Returns None when there is nothing to search for.
+    """
+    if '"' in text:
+        return SearchQuery(text, search_type="websearch", config=SEARCH_CONFIG)
+
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return None
+    return SearchQuery(
+        " & ".join(f"{word}:*" for word in words),
+        search_type="raw",
+        config=SEARCH_CONFIG,
+    )
+
+
+def filter_person_list(queryset, params):
+    """
+    The person list filters: `q` (full-text, prefix-matched), `gender`
+    and `living` (yes/no). Shared by the list page and the data exports.
+    """
+    q = params.get("q")
+    gender = params.get("gender")
+    living = params.get("living")
+
+    if q:
+        # Stored, GIN-indexed tsvector instead of OR-ed icontains scans.
+        # Rows not yet given a vector fall back to the old substring match.
+        query = build_search_query(q)
+        unindexed = Q(search_vector__isnull=True) & (
+            Q(first_name__icontains=q) | Q(last_name__icontains=q) | Q(birth_place__icontains=q)
+        )
+        queryset = queryset.filter(Q(search_vector=query) | unindexed if query else unindexed)
+
+    if gender in ("male", "female", "other"):
+        queryset = queryset.filter(gender=gender)
+
+    if living in ("yes", "no"):
+        queryset = queryset.filter(is_living=(living == "yes"))
+
+    return queryset
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import LIFESPAN, Person
+from .search import PERSON_SEARCH_VECTOR, PHONETIC_CODES
+
+
+@receiver(post_save, sender=Person)
+def update_search_vector(sender, instance, **kwargs):
+    """
+    Recompute the stored tsvector, phonetic codes and lifespan from the
+    row that was just saved.
+    A queryset update does not send post_save, so this does not recurse.
+    """
+    Person.objects.filter(pk=instance.pk).update(
+        search_vector=PERSON_SEARCH_VECTOR, lifespan=LIFESPAN, **PHONETIC_CODES
+    )
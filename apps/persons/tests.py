@@ -1,3 +1,52 @@
-from django.test import TestCase
+import base64
+from datetime import date
 
-# Create your tests here.
+from django.db.models import Q
+from django.test import SimpleTestCase
+
+from .pagination import KeysetPaginator, decode_cursor, encode_cursor, keyset_filter
+
+
+class CursorTests(SimpleTestCase):
+    def test_round_trip(self):
+        values = ["n", "Smith", "John", 42]
+        token = encode_cursor(values)
+        self.assertNotIn("=", token)
+        self.assertEqual(decode_cursor(token), values)
+
+    def test_non_json_values_are_stringified(self):
+        self.assertEqual(decode_cursor(encode_cursor([0.5, date(1900, 1, 2), 7])), [0.5, "1900-01-02", 7])
+
+    def test_unicode_and_url_safety(self):
+        token = encode_cursor(["Łukasiewicz", "Zoë", "?&/+"])
+        self.assertRegex(token, r"^[A-Za-z0-9_-]+$")
+        self.assertEqual(decode_cursor(token), ["Łukasiewicz", "Zoë", "?&/+"])
+
+    def test_malformed_tokens(self):
+        for token in (None, "", "!!!", "bm90IGpzb24", encode_cursor([1])[:-2] + "$"):
+            self.assertIsNone(decode_cursor(token), token)
+
+    def test_non_list_payload(self):
+        token = base64.urlsafe_b64encode(b'{"a": 1}').decode()
+        self.assertIsNone(decode_cursor(token))
+
+    def test_paginator_rejects_foreign_tokens(self):
+        paginator = KeysetPaginator(None, ordering=("last_name", "first_name", "id"))
+        self.assertEqual(paginator.parse_token(encode_cursor(["p", "Smith", "John", 3])), ("p", ["Smith", "John", 3]))
+        self.assertEqual(paginator.parse_token(encode_cursor(["x", "Smith", "John", 3])), ("n", None))
+        self.assertEqual(paginator.parse_token(encode_cursor(["n", "Smith", 3])), ("n", None))
+        self.assertEqual(paginator.parse_token("garbage"), ("n", None))
+
+
+class KeysetFilterTests(SimpleTestCase):
+    def test_ascending(self):
+        self.assertEqual(
+            keyset_filter(["last_name", "id"], ["Smith", 5]),
+            Q(last_name__gte="Smith") & (Q(last_name__gt="Smith") | Q(last_name="Smith", id__gt=5)),
+        )
+
+    def test_descending_leading_column(self):
+        self.assertEqual(
+            keyset_filter(["-score", "id"], [0.8, 5]),
+            Q(score__lte=0.8) & (Q(score__lt=0.8) | Q(score=0.8, id__gt=5)),
+        )
@@ -1,13 +1,14 @@
 from django.shortcuts import get_object_or_404, redirect
-from django.db.models import Q
 from .models import Person
 from .mixins import FamilyPermissionMixin
 from django.views.generic import CreateView,DetailView,UpdateView,DeleteView,ListView
 from django.urls import reverse,reverse_lazy
 from .forms import PersonForm
+from .pagination import KeysetPaginationMixin
+from .search import filter_person_list
 from apps.activitylog.utils import log_activity
 
-class PersonListView(FamilyPermissionMixin, ListView):
+class PersonListView(FamilyPermissionMixin, KeysetPaginationMixin, ListView):
     model = Person
     template_name = "persons/person_list.html"
     paginate_by = 50
@@ -15,26 +16,8 @@ class PersonListView(FamilyPermissionMixin, ListView):
     allowed_roles = ["owner", "admin", "editor", "viewer"]
 
     def get_queryset(self):
-        qs = Person.objects.filter(family=self.family).order_by("last_name")
-
-        q = self.request.GET.get("q")
-        gender = self.request.GET.get("gender")
-        living = self.request.GET.get("living")
-
-        if q:
-            qs = qs.filter(
-                Q(first_name__icontains=q) |
-                Q(last_name__icontains=q) |
-                Q(birth_place__icontains=q)
-            )
-
-        if gender in ("male", "female", "other"):
-            qs = qs.filter(gender=gender)
-
-        if living in ("yes", "no"):
-            qs = qs.filter(is_living=(living == "yes"))
-
-        return qs
+        # Ordered by (last_name, first_name, id) by the keyset paginator
+        return filter_person_list(Person.objects.filter(family=self.family), self.request.GET)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class RelationshipsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.relationships'
+
+    def ready(self):
+        # keep the ancestry closure table in sync with Relationship writes
+        import apps.relationships.signals  # noqa: F401
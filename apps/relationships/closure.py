@@ -0,0 +1,137 @@
+import threading
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+
+from .models import AncestryClosure, Relationship
+
+CLOSURE_TABLE = AncestryClosure._meta.db_table
+RELATIONSHIP_TABLE = Relationship._meta.db_table
+
+# Every (ancestor of parent) x (descendant of child) pair gains a path
+# through the new edge. The parent and child themselves join in at depth 0.
+INSERT_EDGE_SQL = f"""
+INSERT INTO {CLOSURE_TABLE} (family_id, ancestor_id, descendant_id, depth)
+SELECT %(family)s, a.ancestor_id, d.descendant_id, a.depth + d.depth + 1
+FROM (
+    SELECT ancestor_id, depth FROM {CLOSURE_TABLE} WHERE descendant_id = %(parent)s
+    UNION ALL SELECT %(parent)s, 0
+) a
+CROSS JOIN (
+    SELECT descendant_id, depth FROM {CLOSURE_TABLE} WHERE ancestor_id = %(child)s
+    UNION ALL SELECT %(child)s, 0
+) d
+WHERE a.ancestor_id <> d.descendant_id
+ON CONFLICT (ancestor_id, descendant_id)
+DO UPDATE SET depth = LEAST({CLOSURE_TABLE}.depth, EXCLUDED.depth)
+"""
+
+# Rebuilds the ancestor rows of the given people from the live "child"
+# edges. `path` stops a corrupt loop in the data from recursing forever.
+RECOMPUTE_SQL = f"""
+WITH RECURSIVE up(descendant_id, ancestor_id, depth, path) AS (
+    SELECT r.person_id, r.related_person_id, 1, ARRAY[r.person_id, r.related_person_id]
+    FROM {RELATIONSHIP_TABLE} r
+    WHERE r.relationship_type = 'child' AND {{scope}}
+  UNION ALL
+    SELECT up.descendant_id, r.related_person_id, up.depth + 1, up.path || r.related_person_id
+    FROM up
+    JOIN {RELATIONSHIP_TABLE} r
+      ON r.person_id = up.ancestor_id AND r.relationship_type = 'child'
+    WHERE NOT r.related_person_id = ANY(up.path)
+)
+INSERT INTO {CLOSURE_TABLE} (family_id, ancestor_id, descendant_id, depth)
+SELECT %(family)s, ancestor_id, descendant_id, MIN(depth)
+FROM up
+WHERE ancestor_id <> descendant_id
+GROUP BY ancestor_id, descendant_id
+"""
+
+
+_state = threading.local()
+
+
+@contextmanager
+def suspended():
+    """
+    Skip the per-row closure updates made by the Relationship signals in
+    this thread. For bulk changes whose caller runs rebuild_family after.
+    """
+    depth = getattr(_state, "depth", 0)
+    _state.depth = depth + 1
+    try:
+        yield
+    finally:
+        _state.depth = depth
+
+
+def is_suspended():
+    return getattr(_state, "depth", 0) > 0
+
+
+def edge_endpoints(relationship):
+    """Return (parent_id, child_id) for a parent/child row, else None."""
+    if relationship.relationship_type == "parent":
+        return relationship.person_id, relationship.related_person_id
+    if relationship.relationship_type == "child":
+        return relationship.related_person_id, relationship.person_id
+    return None
+
+
+def add_edge(family_id, parent_id, child_id):
+    with connection.cursor() as cursor:
+        cursor.execute(INSERT_EDGE_SQL, {"family": family_id, "parent": parent_id, "child": child_id})
+
+
+def refresh_subtree(family_id, person_id):
+    """Recompute the ancestor rows of `person_id` and everyone below them."""
+    affected = [person_id, *AncestryClosure.objects.filter(
+        ancestor_id=person_id
+    ).values_list("descendant_id", flat=True)]
+
+    with transaction.atomic():
+        AncestryClosure.objects.filter(descendant_id__in=affected).delete()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                RECOMPUTE_SQL.format(scope="r.person_id = ANY(%(people)s)"),
+                {"family": family_id, "people": affected},
+            )
+
+
+def remove_edge(family_id, parent_id, child_id):
+    # Only the child's side of the graph can lose ancestors
+    refresh_subtree(family_id, child_id)
+
+
+def rebuild_family(family_id):
+    """Drop and rebuild every closure row for one family from its edges."""
+    with transaction.atomic():
+        AncestryClosure.objects.filter(family_id=family_id).delete()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                RECOMPUTE_SQL.format(scope="r.family_id = %(family)s"),
+                {"family": family_id},
+            )
+
+
+# -------------------------
+# LOOKUPS
+# -------------------------
+def is_ancestor(ancestor_id, descendant_id):
+    return AncestryClosure.objects.filter(
+        ancestor_id=ancestor_id, descendant_id=descendant_id
+    ).exists()
+
+
+def ancestor_ids(person_id, max_depth=None):
+    qs = AncestryClosure.objects.filter(descendant_id=person_id)
+    if max_depth is not None:
+        qs = qs.filter(depth__lte=max_depth)
+    return dict(qs.values_list("ancestor_id", "depth"))
+
+
+def descendant_ids(person_id, max_depth=None):
+    qs = AncestryClosure.objects.filter(ancestor_id=person_id)
+    if max_depth is not None:
+        qs = qs.filter(depth__lte=max_depth)
+    return dict(qs.values_list("descendant_id", "depth"))
@@ -0,0 +1,76 @@
+from collections import defaultdict, deque
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.families.models import Family
+from apps.relationships import closure
+from apps.relationships.models import AncestryClosure, Relationship
+
+
+def expected_closure(family_id):
+    """Compute {(ancestor, descendant): depth} from the live "child" edges."""
+    parents = defaultdict(list)
+    rows = Relationship.objects.filter(
+        family_id=family_id, relationship_type="child"
+    ).values_list("person_id", "related_person_id")
+    for child_id, parent_id in rows.iterator(chunk_size=5000):
+        parents[child_id].append(parent_id)
+
+    expected = {}
+    for person_id in list(parents):
+        seen = {person_id}
+        queue = deque([(person_id, 0)])
+        while queue:
+            current, depth = queue.popleft()
+            for parent_id in parents.get(current, ()):
+                if parent_id in seen:
+                    continue
+                seen.add(parent_id)
+                expected[(parent_id, person_id)] = depth + 1
+                queue.append((parent_id, depth + 1))
+    return expected
+
+
+class Command(BaseCommand):
+    help = "Rebuild the ancestry closure table for one or more families and verify it against the live edges."
+
+    def add_arguments(self, parser):
+        parser.add_argument("family_ids", nargs="*", type=int)
+        parser.add_argument("--all", action="store_true", help="Process every family.")
+        parser.add_argument("--check-only", action="store_true", help="Verify without rebuilding.")
+
+    def handle(self, *args, **options):
+        if options["all"]:
+            family_ids = list(Family.objects.values_list("id", flat=True))
+        else:
+            family_ids = options["family_ids"]
+        if not family_ids:
+            raise CommandError("Pass one or more family ids, or --all.")
+
+        failed = []
+        for family_id in family_ids:
+            if not options["check_only"]:
+                closure.rebuild_family(family_id)
+
+            expected = expected_closure(family_id)
+            actual = {
+                (a, d): depth
+                for a, d, depth in AncestryClosure.objects.filter(family_id=family_id)
+                .values_list("ancestor_id", "descendant_id", "depth")
+                .iterator(chunk_size=5000)
+            }
+            missing = expected.keys() - actual.keys()
+            extra = actual.keys() - expected.keys()
+            wrong = [k for k in expected.keys() & actual.keys() if expected[k] != actual[k]]
+
+            if missing or extra or wrong:
+                failed.append(family_id)
+                self.stdout.write(self.style.ERROR(
+                    f"Family {family_id}: {len(missing)} missing, {len(extra)} extra, "
+                    f"{len(wrong)} wrong depth ({len(actual)} rows)"
+                ))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"Family {family_id}: {len(actual)} rows OK"))
+
+        if failed:
+            raise CommandError(f"Closure mismatch for families: {', '.join(map(str, failed))}")
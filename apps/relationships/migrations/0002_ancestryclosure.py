@@ -0,0 +1,51 @@
+# Generated by Django 5.0 on 2026-10-18 14:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+BACKFILL_SQL = """
+WITH RECURSIVE up(family_id, descendant_id, ancestor_id, depth, path) AS (
+    SELECT r.family_id, r.person_id, r.related_person_id, 1, ARRAY[r.person_id, r.related_person_id]
+    FROM relationships_relationship r
+    WHERE r.relationship_type = 'child'
+  UNION ALL
+    SELECT up.family_id, up.descendant_id, r.related_person_id, up.depth + 1, up.path || r.related_person_id
+    FROM up
+    JOIN relationships_relationship r
+      ON r.person_id = up.ancestor_id AND r.relationship_type = 'child'
+    WHERE NOT r.related_person_id = ANY(up.path)
+)
+INSERT INTO relationships_ancestryclosure (family_id, ancestor_id, descendant_id, depth)
+SELECT MIN(family_id), ancestor_id, descendant_id, MIN(depth)
+FROM up
+WHERE ancestor_id <> descendant_id
+GROUP BY ancestor_id, descendant_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('families', '0004_remove_joinrequest_approved_joinrequest_status'),
+        ('persons', '0003_person_person_name_gin'),
+        ('relationships', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AncestryClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveSmallIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='persons.person')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='persons.person')),
+                ('family', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestry_closure', to='families.family')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['descendant', 'depth'], name='closure_descendant_depth')],
+                'unique_together': {('ancestor', 'descendant')},
+            },
+        ),
+        migrations.RunSQL(BACKFILL_SQL, reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,106 @@
+from django.db import migrations
+
+# Before the parent/child checks moved to relationships/services.py,
+# AddChildView stored "X adds child Y" as (X, Y, 'child') and
+# (Y, X, 'parent'), i.e. X as Y's child. A 'child' row (a, b) is taken to
+# be such a pair when the activity log records "Created child relationship
+# between a and b" on a's page, or when a was born before b.
+FIND_INVERTED_SQL = """
+CREATE TEMP TABLE inverted_child_edges ON COMMIT DROP AS
+SELECT r.family_id, r.person_id AS parent_id, r.related_person_id AS child_id
+FROM relationships_relationship r
+JOIN persons_person a ON a.id = r.person_id
+JOIN persons_person b ON b.id = r.related_person_id
+WHERE r.relationship_type = 'child' AND (
+    a.birth_date < b.birth_date
+    OR EXISTS (
+        SELECT 1 FROM activitylog_activitylog l
+        WHERE l.family_id = r.family_id
+          AND l.target_type = 'relationship'
+          AND l.action_type = 'create'
+          AND l.target_id = a.id
+          AND l.description = 'Created child relationship between '
+              || trim(a.first_name || ' ' || coalesce(a.middle_name, '') || ' ' || a.last_name)
+              || ' and '
+              || trim(b.first_name || ' ' || coalesce(b.middle_name, '') || ' ' || b.last_name)
+    )
+)
+"""
+
+# Where the correct pair also exists, the inverted rows are just dropped
+DROP_DUPLICATES_SQL = """
+DELETE FROM relationships_relationship r
+USING inverted_child_edges e
+WHERE (
+    r.person_id = e.parent_id AND r.related_person_id = e.child_id AND r.relationship_type = 'child'
+    AND EXISTS (
+        SELECT 1 FROM relationships_relationship x
+        WHERE x.person_id = e.parent_id AND x.related_person_id = e.child_id AND x.relationship_type = 'parent'
+    )
+) OR (
+    r.person_id = e.child_id AND r.related_person_id = e.parent_id AND r.relationship_type = 'parent'
+    AND EXISTS (
+        SELECT 1 FROM relationships_relationship x
+        WHERE x.person_id = e.child_id AND x.related_person_id = e.parent_id AND x.relationship_type = 'child'
+    )
+)
+"""
+
+FLIP_SQL = [
+    """
+    UPDATE relationships_relationship r SET relationship_type = 'parent'
+    FROM inverted_child_edges e
+    WHERE r.person_id = e.parent_id AND r.related_person_id = e.child_id AND r.relationship_type = 'child'
+    """,
+    """
+    UPDATE relationships_relationship r SET relationship_type = 'child'
+    FROM inverted_child_edges e
+    WHERE r.person_id = e.child_id AND r.related_person_id = e.parent_id AND r.relationship_type = 'parent'
+    """,
+]
+
+# Same recursion as 0002's backfill, over the corrected edges
+REBUILD_CLOSURE_SQL = [
+    "DELETE FROM relationships_ancestryclosure",
+    """
+    WITH RECURSIVE up(family_id, descendant_id, ancestor_id, depth, path) AS (
+        SELECT r.family_id, r.person_id, r.related_person_id, 1, ARRAY[r.person_id, r.related_person_id]
+        FROM relationships_relationship r
+        WHERE r.relationship_type = 'child'
+      UNION ALL
+        SELECT up.family_id, up.descendant_id, r.related_person_id, up.depth + 1, up.path || r.related_person_id
+        FROM up
+        JOIN relationships_relationship r
+          ON r.person_id = up.ancestor_id AND r.relationship_type = 'child'
+        WHERE NOT r.related_person_id = ANY(up.path)
+    )
+    INSERT INTO relationships_ancestryclosure (family_id, ancestor_id, descendant_id, depth)
+    SELECT MIN(family_id), ancestor_id, descendant_id, MIN(depth)
+    FROM up
+    WHERE ancestor_id <> descendant_id
+    GROUP BY ancestor_id, descendant_id
+    """,
+]
+
+# Cached trees, search results and exports of these families are stale
+BUMP_VERSIONS_SQL = """
+UPDATE families_family SET data_version = data_version + 1
+WHERE id IN (SELECT DISTINCT family_id FROM inverted_child_edges)
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activitylog', '0001_initial'),
+        ('families', '0005_family_data_version'),
+        ('persons', '0010_person_lifespan'),
+        ('relationships', '0002_ancestryclosure'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            [FIND_INVERTED_SQL, DROP_DUPLICATES_SQL, *FLIP_SQL, *REBUILD_CLOSURE_SQL, BUMP_VERSIONS_SQL],
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
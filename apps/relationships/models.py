@@ -5,6 +5,7 @@ from django.utils import timezone
 from apps.accounts.models import User
 from apps.families.models import Family
 from apps.persons.models import Person
+from .validators import check_age_order
 
 
 class Relationship(models.Model):
@@ -58,14 +59,10 @@ class Relationship(models.Model):
 
         # Prevent circular parent-child (A parent of B but B is older)
         if self.relationship_type == "parent":
-            if self.person.birth_date and self.related_person.birth_date:
-                if self.person.birth_date >= self.related_person.birth_date:
-                    raise ValidationError("Parent must be older than child.")
+            check_age_order(self.person, self.related_person)
 
         if self.relationship_type == "child":
-            if self.person.birth_date and self.related_person.birth_date:
-                if self.person.birth_date <= self.related_person.birth_date:
-                    raise ValidationError("Child must be younger than parent.")
+            check_age_order(self.related_person, self.person)
 
     # -------------------------
     # SAVE HANDLER FOR AUTO-BIDIRECTIONAL
@@ -91,3 +88,33 @@ class Relationship(models.Model):
                 defaults={"created_by": self.created_by}
             )
 
+
+
+class AncestryClosure(models.Model):
+    """
+    Materialised ancestor/descendant pairs for the parent/child graph.
+    `depth` is the shortest number of generations between the two people.
+    Maintained from Relationship signals (see closure.py).
+    """
+
+    family = models.ForeignKey(Family, on_delete=models.CASCADE, related_name="ancestry_closure")
+    ancestor = models.ForeignKey(
+        Person,
+        on_delete=models.CASCADE,
+        related_name="descendant_links"
+    )
+    descendant = models.ForeignKey(
+        Person,
+        on_delete=models.CASCADE,
+        related_name="ancestor_links"
+    )
+    depth = models.PositiveSmallIntegerField()
+
+    class Meta:
+        unique_together = ("ancestor", "descendant")
+        indexes = [
+            models.Index(fields=["descendant", "depth"], name="closure_descendant_depth"),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor} -> {self.descendant} ({self.depth})"
@@ -0,0 +1,27 @@
+from django.core.exceptions import ValidationError
+
+from . import closure
+from .validators import check_age_order
+
+
+def would_create_cycle(parent_id, child_id):
+    """
+    Adding parent -> child closes a loop only if the child is already the
+    parent (or one of their ancestors). One indexed closure-table lookup.
+    """
+    return parent_id == child_id or closure.is_ancestor(child_id, parent_id)
+
+
+def validate_parent_edge(parent, child):
+    """
+    Run every check for a new parent/child edge in one pass: same family,
+    age ordering and circular ancestry. Raises ValidationError.
+    Needs no queries beyond the closure lookup, whatever the tree depth.
+    """
+    if parent.id == child.id:
+        raise ValidationError("A person cannot be related to themselves.")
+    if parent.family_id != child.family_id:
+        raise ValidationError("Both persons must belong to the same family.")
+    check_age_order(parent, child)
+    if would_create_cycle(parent.id, child.id):
+        raise ValidationError(f"Cannot add {parent} as parent of {child} due to circular ancestry.")
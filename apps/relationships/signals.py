@@ -0,0 +1,34 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import closure
+from .models import Relationship
+
+
+@receiver(post_save, sender=Relationship)
+def update_closure_on_save(sender, instance, created, **kwargs):
+    """
+    Extend the ancestry closure when a parent/child edge is added.
+    Both rows of a pair (including the auto-created reverse) end up here;
+    the insert is idempotent so the second one is a no-op.
+    """
+    if closure.is_suspended():
+        return
+    if not created:
+        # The edge may have changed type or endpoints: recompute both sides
+        closure.refresh_subtree(instance.family_id, instance.person_id)
+        closure.refresh_subtree(instance.family_id, instance.related_person_id)
+        return
+
+    edge = closure.edge_endpoints(instance)
+    if edge:
+        closure.add_edge(instance.family_id, *edge)
+
+
+@receiver(post_delete, sender=Relationship)
+def update_closure_on_delete(sender, instance, **kwargs):
+    if closure.is_suspended():
+        return
+    edge = closure.edge_endpoints(instance)
+    if edge:
+        closure.remove_edge(instance.family_id, *edge)
@@ -1,3 +1,68 @@
+from datetime import date
+
+from django.core.exceptions import ValidationError
 from django.test import TestCase
 
-# Create your tests here.
+from apps.accounts.models import User
+from apps.families.models import Family
+from apps.persons.models import Person
+from . import closure
+from .models import Relationship
+from .services import validate_parent_edge, would_create_cycle
+
+
+class CycleCheckTests(TestCase):
+    """grandparent -> parent -> child, plus an unrelated person."""
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user("owner", "owner@example.com", "password")
+        cls.family = Family.objects.create(name="Test", owner=owner)
+        cls.grandparent, cls.parent, cls.child, cls.stranger = [
+            Person.objects.create(family=cls.family, first_name=name, gender="male")
+            for name in ("Grandparent", "Parent", "Child", "Stranger")
+        ]
+        Relationship.objects.create(
+            family=cls.family, person=cls.grandparent, related_person=cls.parent, relationship_type="parent"
+        )
+        # Stored from the child's side: "child" rows point to the parent
+        Relationship.objects.create(
+            family=cls.family, person=cls.child, related_person=cls.parent, relationship_type="child"
+        )
+
+    def test_closure_follows_both_row_directions(self):
+        self.assertEqual(closure.ancestor_ids(self.child.id), {self.parent.id: 1, self.grandparent.id: 2})
+        self.assertEqual(closure.descendant_ids(self.grandparent.id), {self.parent.id: 1, self.child.id: 2})
+
+    def test_self_link_is_a_cycle(self):
+        self.assertTrue(would_create_cycle(self.parent.id, self.parent.id))
+
+    def test_descendant_as_parent_is_a_cycle(self):
+        self.assertTrue(would_create_cycle(self.child.id, self.parent.id))
+        self.assertTrue(would_create_cycle(self.child.id, self.grandparent.id))
+
+    def test_ancestor_again_is_not_a_cycle(self):
+        # A second, shorter path to an existing ancestor is not a loop
+        self.assertFalse(would_create_cycle(self.grandparent.id, self.child.id))
+        self.assertFalse(would_create_cycle(self.stranger.id, self.child.id))
+        self.assertFalse(would_create_cycle(self.child.id, self.stranger.id))
+
+    def test_removing_an_edge_breaks_the_cycle(self):
+        Relationship.objects.filter(person=self.grandparent, related_person=self.parent).delete()
+        Relationship.objects.filter(person=self.parent, related_person=self.grandparent).delete()
+        self.assertEqual(closure.ancestor_ids(self.child.id), {self.parent.id: 1})
+        self.assertFalse(would_create_cycle(self.child.id, self.grandparent.id))
+
+    def test_validate_parent_edge(self):
+        with self.assertRaises(ValidationError):
+            validate_parent_edge(self.child, self.grandparent)
+        validate_parent_edge(self.stranger, self.child)
+
+    def test_validate_parent_edge_checks_age_order(self):
+        older = Person(family=self.family, first_name="Older", gender="female", birth_date=date(1900, 1, 1))
+        younger = Person(family=self.family, first_name="Younger", gender="female", birth_date=date(1950, 1, 1))
+        older.save()
+        younger.save()
+        with self.assertRaises(ValidationError):
+            validate_parent_edge(younger, older)
+        validate_parent_edge(older, younger)
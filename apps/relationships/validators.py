@@ -0,0 +1,7 @@
+from django.core.exceptions import ValidationError
+
+
+def check_age_order(parent, child):
+    """Raise ValidationError unless `parent` was born before `child` (when both dates are known)."""
+    if parent.birth_date and child.birth_date and parent.birth_date >= child.birth_date:
+        raise ValidationError("Parent must be older than child.")
@@ -7,6 +7,8 @@ from apps.families.models import Family
 from apps.persons.models import Person
 from .forms import RelationshipForm
 from .models import Relationship
+from .services import validate_parent_edge
+from django.core.exceptions import ValidationError
 from django.db import IntegrityError
 
 
@@ -42,23 +44,6 @@ class BaseAddRelationshipView(View):
         related_person_id = request.POST.get("related_person")
         related_person = get_object_or_404(Person, id=related_person_id, family=family)
 
-        # Helper: check for circular ancestry
-        def is_ancestor(possible_ancestor, descendant):
-            visited = set()
-            queue = [descendant]
-            while queue:
-                current = queue.pop()
-                if current == possible_ancestor:
-                    return True
-                if current in visited:
-                    continue
-                visited.add(current)
-                parents = Relationship.objects.filter(
-                    person=current, relationship_type='child'
-                ).values_list('related_person', flat=True)
-                queue.extend(Person.objects.filter(id__in=parents))
-            return False
-
         # Helper: safely create relationship
         def safe_create(person1, person2, r_type):
             try:
@@ -74,21 +59,24 @@ class BaseAddRelationshipView(View):
                 pass
 
         # Process relationship types
-        if self.relationship_type == "parent":
-            if is_ancestor(related_person, person):
-                messages.error(request, f"Cannot add {related_person} as parent due to circular ancestry.")
-                return redirect("persons:person_detail", pk=family.id, person_id=person.id)
+        if self.relationship_type in ("parent", "child"):
+            if self.relationship_type == "parent":
+                parent, child = related_person, person
+            else:
+                parent, child = person, related_person
 
-            safe_create(related_person, person, "parent")
-            safe_create(person, related_person, "child")
-
-        elif self.relationship_type == "child":
-            if is_ancestor(person, related_person):
-                messages.error(request, f"Cannot add {related_person} as child due to circular ancestry.")
+            # Cycle and age checks in one pass, fixed query cost
+            try:
+                validate_parent_edge(parent, child)
+            except ValidationError as e:
+                messages.error(request, e.messages[0])
                 return redirect("persons:person_detail", pk=family.id, person_id=person.id)
 
-            safe_create(person, related_person, "child")
-            safe_create(related_person, person, "parent")
+            # (A, B, "parent") means A is B's parent. AddChildView used to
+            # write the pair the other way round; migration 0003 flips
+            # the rows it created.
+            safe_create(parent, child, "parent")
+            safe_create(child, parent, "child")
 
         elif self.relationship_type == "spouse":
             # Avoid self-spouse
@@ -1,42 +1,162 @@
+import time
 from collections import deque
-from apps.relationships.models import Relationship
 
-def bfs_relationship_path(start, end):
-    queue = deque([[start]])
-    visited = set()
-    while queue:
-        path = queue.popleft()
-        current = path[-1]
-        if current == end:
-            return path
-        if current in visited:
-            continue
-        visited.add(current)
-        neighbors = [rel.related_person for rel in Relationship.objects.filter(person=current)]
-        for n in neighbors:
-            queue.append(path + [n])
+from apps.persons.models import Person
+from .graph import get_family_graph
+
+
+def _hydrate(person_ids):
+    """Fetch Person rows for a collection of ids in a single query."""
+    return Person.objects.in_bulk(list(person_ids))
+
+
+INVERSE_EDGE = {"parent": "child", "child": "parent", "spouse": "spouse"}
+
+
+def relationship_path(graph, start_id, end_id):
+    """
+    Shortest path between two people using a bidirectional BFS.
+
+    Each side keeps parent pointers (node -> (previous node, edge type))
+    instead of copying the path on every step, and the smaller frontier is
+    expanded first. Returns (person_ids, edge_types) where edge_types[i] is
+    what person_ids[i + 1] is to person_ids[i], or None if unrelated.
+    """
+    if start_id == end_id:
+        return [start_id], []
+
+    forward = {start_id: None}
+    backward = {end_id: None}
+    depth = {start_id: 0, end_id: 0}
+    forward_frontier = [start_id]
+    backward_frontier = [end_id]
+
+    while forward_frontier and backward_frontier:
+        expand_forward = len(forward_frontier) <= len(backward_frontier)
+        if expand_forward:
+            frontier, seen, other = forward_frontier, forward, backward
+        else:
+            frontier, seen, other = backward_frontier, backward, forward
+
+        # Finish the whole level before stopping: the first meeting found
+        # is not necessarily the one closest to the other side.
+        next_frontier = []
+        meeting = None
+        for current in frontier:
+            for nxt, edge in graph.typed_neighbours(current):
+                if nxt in seen:
+                    continue
+                # Backward pointers record the edge as seen walking towards `end`
+                seen[nxt] = (current, edge if expand_forward else INVERSE_EDGE[edge])
+                if nxt in other:
+                    if meeting is None or depth[nxt] < depth[meeting]:
+                        meeting = nxt
+                    continue
+                depth[nxt] = depth[current] + 1
+                next_frontier.append(nxt)
+
+        if meeting is not None:
+            return _join_paths(forward, backward, meeting)
+
+        if expand_forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
     return None
 
 
-def dfs_ancestors(person, visited=None):
-    if visited is None:
-        visited = set()
-    parents = Relationship.objects.filter(person=person, relationship_type="child")
-    for rel in parents:
-        parent = rel.related_person
-        if parent not in visited:
-            visited.add(parent)
-            dfs_ancestors(parent, visited)
-    return visited
+def _join_paths(forward, backward, meeting):
+    ids, edges = [meeting], []
+    node = meeting
+    while forward[node] is not None:
+        node, edge = forward[node]
+        ids.append(node)
+        edges.append(edge)
+    ids.reverse()
+    edges.reverse()
+
+    node = meeting
+    while backward[node] is not None:
+        node, edge = backward[node]
+        ids.append(node)
+        edges.append(edge)
+    return ids, edges
 
 
-def dfs_descendants(person, visited=None):
-    if visited is None:
-        visited = set()
-    children = Relationship.objects.filter(person=person, relationship_type="parent")
-    for rel in children:
-        child = rel.related_person
-        if child not in visited:
-            visited.add(child)
-            dfs_descendants(child, visited)
+class PathSearch:
+    """
+    Incremental single-source BFS over a family graph.
+
+    The frontier and parent pointers survive between calls, so asking for
+    paths from the same start to many ends only explores each person once.
+    """
+
+    def __init__(self, graph, start_id):
+        self.graph = graph
+        self.start_id = start_id
+        self.prev = {start_id: None}
+        self.queue = deque([start_id])
+
+    def path_to(self, end_id, deadline=None):
+        """
+        Return (person_ids, edge_types) like relationship_path, or None if
+        unreachable. Raises TimeoutError once `deadline` (monotonic) passes.
+        """
+        expanded = 0
+        while end_id not in self.prev and self.queue:
+            current = self.queue.popleft()
+            for nxt, edge in self.graph.typed_neighbours(current):
+                if nxt not in self.prev:
+                    self.prev[nxt] = (current, edge)
+                    self.queue.append(nxt)
+            expanded += 1
+            if deadline is not None and expanded % 1024 == 0 and time.monotonic() > deadline:
+                raise TimeoutError
+
+        if end_id not in self.prev:
+            return None
+
+        ids, edges = [end_id], []
+        node = end_id
+        while self.prev[node] is not None:
+            node, edge = self.prev[node]
+            ids.append(node)
+            edges.append(edge)
+        ids.reverse()
+        edges.reverse()
+        return ids, edges
+
+
+def bfs_relationship_path(start, end, graph=None):
+    if graph is None:
+        graph = get_family_graph(start.family_id)
+
+    found = relationship_path(graph, start.id, end.id)
+    if found is None:
+        return None
+    persons = _hydrate(found[0])
+    return [persons[pid] for pid in found[0]]
+
+
+def _walk(graph, start_id, step):
+    visited = set()
+    stack = [start_id]
+    while stack:
+        current = stack.pop()
+        for nxt in step(current):
+            if nxt not in visited:
+                visited.add(nxt)
+                stack.append(nxt)
     return visited
+
+
+def dfs_ancestors(person, graph=None):
+    if graph is None:
+        graph = get_family_graph(person.family_id)
+    return set(_hydrate(_walk(graph, person.id, graph.parents_of)).values())
+
+
+def dfs_descendants(person, graph=None):
+    if graph is None:
+        graph = get_family_graph(person.family_id)
+    return set(_hydrate(_walk(graph, person.id, graph.children_of)).values())
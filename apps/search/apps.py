@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SearchConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.search'
+
+    def ready(self):
+        # keep cached family graphs in sync with Relationship writes
+        import apps.search.signals  # noqa: F401
@@ -0,0 +1,103 @@
+import unicodedata
+from array import array
+from bisect import bisect_left
+from threading import Lock
+
+from apps.persons.models import Person
+from .cache import make_key, result_cache
+from .graph import data_version
+
+
+def normalize(text):
+    """Lower-case, strip accents and collapse whitespace."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.lower().split())
+
+
+class PrefixIndex:
+    """
+    Sorted array of normalised name keys for one family, searched with bisect.
+
+    Every person contributes their full name starting at each word, so
+    "smi", "paul sm" and "john paul smith" all match John Paul Smith.
+    """
+
+    def __init__(self, rows):
+        entries = []
+        self.labels = {}
+        for person_id, first, middle, last in rows:
+            label = " ".join(part for part in (first, middle, last) if part)
+            self.labels[person_id] = label
+            words = normalize(label).split()
+            for i in range(len(words)):
+                entries.append((" ".join(words[i:]), person_id))
+        entries.sort()
+        self.keys = [key for key, _ in entries]
+        self.ids = [person_id for _, person_id in entries]
+
+    @classmethod
+    def build(cls, family_id):
+        rows = Person.objects.filter(family_id=family_id).values_list(
+            "id", "first_name", "middle_name", "last_name"
+        )
+        return cls(rows.iterator(chunk_size=5000))
+
+    def search(self, term, limit=10):
+        term = normalize(term)
+        if not term:
+            return []
+        results = []
+        seen = set()
+        i = bisect_left(self.keys, term)
+        while i < len(self.keys) and self.keys[i].startswith(term) and len(results) < limit:
+            person_id = self.ids[i]
+            if person_id not in seen:
+                seen.add(person_id)
+                results.append((person_id, self.labels[person_id]))
+            i += 1
+        return results
+
+
+_indexes = {}
+_lock = Lock()
+
+
+def invalidate(family_id):
+    """
+    Drop this process's index early. Other processes notice the change
+    through Family.data_version the next time they are asked.
+    """
+    with _lock:
+        _indexes.pop(family_id, None)
+
+
+def _current(family_id):
+    version = data_version(family_id)
+    entry = _indexes.get(family_id)
+    if entry is None or entry[0] != version:
+        with _lock:
+            entry = _indexes.get(family_id)
+            if entry is None or entry[0] != version:
+                # Version read before the rows, as in get_family_graph
+                entry = _indexes[family_id] = (version, PrefixIndex.build(family_id))
+    return entry
+
+
+def get_index(family_id):
+    """Return the family's prefix index, building it lazily on first use."""
+    return _current(family_id)[1]
+
+
+def autocomplete(family_id, term, limit=10):
+    """
+    Return [(person id, label)] for names starting with `term`. Repeated
+    terms are answered from the result cache, keyed by the index version
+    (the family's data_version, which changes whenever a person does).
+    """
+    version, index = _current(family_id)
+    key = make_key(family_id, version, "autocomplete", normalize(term), [("limit", limit)])
+    cached = result_cache.get_or_build(
+        key, lambda: (array("q", (pid for pid, _ in index.search(term, limit))),)
+    )
+    return [(pid, index.labels[pid]) for pid in cached[0]]
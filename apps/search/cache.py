@@ -0,0 +1,164 @@
+"""
+In-process cache of search result id lists.
+
+Only ids (and, for ranked searches, scores) are kept, packed in arrays;
+views hydrate just the rows of the page they show. Keys include the
+family's data_version, which every Person/Relationship change bumps, so
+stale entries are simply never asked for again and age out of the LRU.
+"""
+import sys
+from array import array
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+
+from apps.persons.pagination import KeysetPage, KeysetPaginator, encode_cursor
+
+# Per-entry bookkeeping on top of the arrays themselves (key tuple, dict slot)
+ENTRY_OVERHEAD = 256
+
+
+def make_key(family_id, data_version, kind, query="", params=()):
+    """
+    Cache key for one search. `params` are the extra (name, value) pairs
+    that change the result set (filters, threshold, limit).
+    """
+    return (family_id, data_version, kind, " ".join(query.lower().split()), tuple(sorted(params)))
+
+
+def _size(value):
+    return ENTRY_OVERHEAD + sum(sys.getsizeof(part) for part in value)
+
+
+class ResultCache:
+    """
+    LRU of result lists bounded by an approximate byte budget.
+    Values are tuples of arrays, e.g. (ids,) or (ids, scores).
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value[0]
+
+    def set(self, key, value):
+        size = _size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def get_or_build(self, key, build):
+        """Return the cached value for `key`, calling build() on a miss. build() may return None to skip caching."""
+        value = self.get(key)
+        if value is None:
+            value = build()
+            if value is not None:
+                self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+        }
+
+
+result_cache = ResultCache(settings.SEARCH_RESULT_CACHE_BYTES)
+
+
+def id_list(queryset):
+    """Pack the ids of `queryset` into an array, or None if there are too many to cache."""
+    limit = settings.SEARCH_RESULT_CACHE_MAX_IDS
+    ids = array("q", queryset.values_list("id", flat=True)[:limit + 1])
+    return None if len(ids) > limit else (ids,)
+
+
+def locate(ids, person_id):
+    """Index of `person_id` in a cached id array, or None."""
+    try:
+        return ids.index(person_id)
+    except ValueError:
+        return None
+
+
+def hydrate(queryset, ids):
+    """Load the persons for `ids`, keeping that order; rows deleted since are skipped."""
+    by_id = queryset.in_bulk(list(ids))
+    return [by_id[i] for i in ids if i in by_id]
+
+
+class CachedKeysetPaginator(KeysetPaginator):
+    """
+    KeysetPaginator over a cached id list. The cursor format is unchanged;
+    its last key (the id) is looked up in the list, so only the page's
+    rows are queried and the total is exact for free. Falls back to the
+    database when the list is too long to cache or the cursor id is not
+    in it (e.g. a cursor issued before the family's data changed).
+    """
+
+    def __init__(self, queryset, cache_key, ordering=("last_name", "first_name", "id"), per_page=50):
+        super().__init__(queryset, ordering, per_page)
+        self.cache_key = cache_key
+
+    def page(self, token=None):
+        cached = result_cache.get_or_build(
+            self.cache_key, lambda: id_list(self.queryset.order_by(*self.ordering))
+        )
+        if cached is None:
+            return super().page(token)
+
+        ids = cached[0]
+        direction, key = self.parse_token(token)
+        if key is None:
+            start, end = 0, self.per_page
+        else:
+            position = locate(ids, key[-1])
+            if position is None:
+                return super().page(token)
+            if direction == "n":
+                start, end = position + 1, position + 1 + self.per_page
+            else:
+                start, end = max(0, position - self.per_page), position
+
+        self.total = len(ids)
+        rows = hydrate(self.queryset, ids[start:end])
+        if not rows:
+            return KeysetPage(rows, None, None)
+        return KeysetPage(
+            rows,
+            encode_cursor(["n", *self._key(rows[-1])]) if end < len(ids) else None,
+            encode_cursor(["p", *self._key(rows[0])]) if start > 0 else None,
+        )
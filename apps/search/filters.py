@@ -0,0 +1,198 @@
+from datetime import date
+
+from django.db.models import Count, Q
+
+# (key, label, first year, last year); None means open-ended
+YEAR_BUCKETS = [
+    ("before-1800", "Before 1800", None, 1799),
+    ("1800-1849", "1800 – 1849", 1800, 1849),
+    ("1850-1899", "1850 – 1899", 1850, 1899),
+    ("1900-1949", "1900 – 1949", 1900, 1949),
+    ("1950-1999", "1950 – 1999", 1950, 1999),
+    ("2000-", "2000 and later", 2000, None),
+]
+
+
+# date() takes years 1..9999, and a range ends the day after its last year
+MIN_YEAR, MAX_YEAR = 1, 9998
+
+
+def _year_range(field, first, last):
+    q = Q()
+    if first is not None:
+        q &= Q(**{f"{field}__gte": date(first, 1, 1)})
+    if last is not None:
+        q &= Q(**{f"{field}__lt": date(last + 1, 1, 1)})
+    return q
+
+
+def _year_facet(field):
+    return [(key, label, _year_range(field, first, last)) for key, label, first, last in YEAR_BUCKETS]
+
+
+# facet name -> [(option value, label, condition)]
+FACETS = {
+    "gender": [
+        ("male", "Male", Q(gender="male")),
+        ("female", "Female", Q(gender="female")),
+        ("other", "Other", Q(gender="other")),
+    ],
+    "living": [
+        ("yes", "Living", Q(is_living=True)),
+        ("no", "Deceased", Q(is_living=False)),
+    ],
+    "born": _year_facet("birth_date"),
+    "died": _year_facet("death_date"),
+}
+
+FACET_TITLES = {"gender": "Gender", "living": "Status", "born": "Born", "died": "Died"}
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _year(value):
+    """A year from the query string, clamped to what date() can represent."""
+    year = _int(value)
+    if year is None:
+        return None
+    return min(max(year, MIN_YEAR), MAX_YEAR)
+
+
+class PersonFilter:
+    """
+    Facet selections and range filters parsed from a query dict.
+
+    Options within one facet are OR-ed, facets are AND-ed. Facet counts
+    follow the usual drill-down rule: each facet is counted with every
+    *other* facet's selection applied, so picking "Male" still shows how
+    many "Female" results there would be.
+    """
+
+    def __init__(self, params):
+        self.selected = {}
+        for name, options in FACETS.items():
+            valid = {value for value, _, _ in options}
+            chosen = [v for v in params.getlist(name) if v in valid]
+            if chosen:
+                self.selected[name] = chosen
+
+        # Older links used ?alive=true|false and ?start_year=&end_year=
+        alive = (params.get("alive") or "").lower()
+        if alive in ("true", "false") and "living" not in self.selected:
+            self.selected["living"] = ["yes" if alive == "true" else "no"]
+
+        self.birth_from = _year(params.get("birth_year_from") or params.get("start_year"))
+        self.birth_to = _year(params.get("birth_year_to") or params.get("end_year"))
+        self.death_from = _year(params.get("death_year_from"))
+        self.death_to = _year(params.get("death_year_to"))
+        self.birth_place = (params.get("birth_place") or "").strip()
+
+        # Lifespan (daterange) filters: alive in a year, alive at some point
+        # in / throughout a span of years, contemporaries of a person, age
+        alive_in = _year(params.get("alive_in"))
+        self.alive_from = _year(params.get("alive_from"))
+        self.alive_to = _year(params.get("alive_to"))
+        if self.alive_from is None:
+            self.alive_from = alive_in if alive_in is not None else self.alive_to
+        if self.alive_to is None:
+            self.alive_to = alive_in if alive_in is not None else self.alive_from
+        if self.alive_from is not None and self.alive_to < self.alive_from:
+            # A range ending before it starts is rejected by PostgreSQL
+            self.alive_from, self.alive_to = self.alive_to, self.alive_from
+        self.alive_match = "contain" if params.get("alive_match") == "contain" else "overlap"
+        self.contemporary_of = _int(params.get("contemporary_of"))
+        self.min_age = _int(params.get("min_age"))
+        self.max_age = _int(params.get("max_age"))
+
+    def cache_params(self):
+        """Hashable description of the filters, for search.cache keys."""
+        params = [(name, tuple(sorted(values))) for name, values in self.selected.items()]
+        params += [
+            ("birth_from", self.birth_from), ("birth_to", self.birth_to),
+            ("death_from", self.death_from), ("death_to", self.death_to),
+            ("birth_place", self.birth_place.lower()),
+            ("alive_from", self.alive_from), ("alive_to", self.alive_to),
+            ("alive_match", self.alive_match), ("contemporary_of", self.contemporary_of),
+            ("min_age", self.min_age), ("max_age", self.max_age),
+        ]
+        return params
+
+    def _facet_condition(self, name):
+        q = Q()
+        for value, _, condition in FACETS[name]:
+            if value in self.selected.get(name, ()):
+                q |= condition
+        return q
+
+    def _selection_except(self, skip=None):
+        q = Q()
+        for name in self.selected:
+            if name != skip:
+                q &= self._facet_condition(name)
+        return q
+
+    def base(self, queryset):
+        """Apply the non-facet filters (year ranges, birth place, lifespan, age)."""
+        scope = queryset
+        if self.birth_from is not None or self.birth_to is not None:
+            queryset = queryset.filter(_year_range("birth_date", self.birth_from, self.birth_to))
+        if self.death_from is not None or self.death_to is not None:
+            queryset = queryset.filter(_year_range("death_date", self.death_from, self.death_to))
+        if self.birth_place:
+            queryset = queryset.filter(birth_place__icontains=self.birth_place)
+        if self.alive_from is not None:
+            start, end = date(self.alive_from, 1, 1), date(self.alive_to, 12, 31)
+            if self.alive_match == "contain":
+                queryset = queryset.alive_throughout(start, end)
+            else:
+                queryset = queryset.alive_during(start, end)
+        if self.contemporary_of is not None:
+            queryset = queryset.contemporaries_of(self.contemporary_of, within=scope)
+        if self.min_age is not None or self.max_age is not None:
+            queryset = queryset.with_age()
+            if self.min_age is not None:
+                queryset = queryset.filter(age_years__gte=self.min_age)
+            if self.max_age is not None:
+                queryset = queryset.filter(age_years__lte=self.max_age)
+        return queryset
+
+    def apply(self, queryset):
+        return self.base(queryset).filter(self._selection_except())
+
+    def facet_counts(self, queryset):
+        """
+        Count every option of every facet in one aggregate query.
+        Returns [{"name", "title", "options": [{"value", "label", "count", "selected"}]}].
+        """
+        aggregates = {}
+        for name, options in FACETS.items():
+            others = self._selection_except(skip=name)
+            for value, _, condition in options:
+                aggregates[f"{name}__{value}"] = Count("id", filter=condition & others)
+
+        counts = self.base(queryset).aggregate(**aggregates)
+        return [
+            {
+                "name": name,
+                "title": FACET_TITLES[name],
+                "options": [
+                    {
+                        "value": value,
+                        "label": label,
+                        "count": counts[f"{name}__{value}"],
+                        "selected": value in self.selected.get(name, ()),
+                    }
+                    for value, label, _ in options
+                ],
+            }
+            for name, options in FACETS.items()
+        ]
+
+
+def apply_person_filters(queryset, filters):
+    return PersonFilter(filters).apply(queryset)
@@ -0,0 +1,133 @@
+from array import array
+from threading import Lock
+
+from apps.families.models import Family
+from apps.relationships.models import Relationship
+
+
+class FamilyGraph:
+    """
+    In-memory snapshot of every Relationship edge in one family.
+
+    Edges are kept as compact integer arrays keyed by person id, so the
+    traversals in algorithms.py never have to go back to the database.
+    """
+
+    def __init__(self, family_id, data_version=None):
+        self.family_id = family_id
+        # Family.data_version the snapshot was loaded at
+        self.data_version = data_version
+        # Incremented on every edge change so derived indexes know to rebuild
+        self.version = 0
+        self.parents = {}
+        self.children = {}
+        self.spouses = {}
+
+    @classmethod
+    def load(cls, family_id, data_version=None):
+        graph = cls(family_id, data_version)
+        rows = Relationship.objects.filter(family_id=family_id).values_list(
+            "person_id", "related_person_id", "relationship_type"
+        )
+        for person_id, related_id, rel_type in rows.iterator(chunk_size=5000):
+            graph.add_edge(person_id, related_id, rel_type)
+        return graph
+
+    # -------------------------
+    # EDGE MAINTENANCE
+    # -------------------------
+    @staticmethod
+    def _link(index, key, value):
+        ids = index.get(key)
+        if ids is None:
+            index[key] = array("q", (value,))
+        elif value not in ids:
+            ids.append(value)
+
+    @staticmethod
+    def _unlink(index, key, value):
+        ids = index.get(key)
+        if ids is not None and value in ids:
+            ids.remove(value)
+            if not ids:
+                del index[key]
+
+    def _edges_for(self, person_id, related_id, rel_type):
+        # Both directions of a pair are stored as rows; normalise them so
+        # the "parent" row and its auto-created "child" row map to one edge.
+        if rel_type == "parent":
+            return [(self.children, person_id, related_id), (self.parents, related_id, person_id)]
+        if rel_type == "child":
+            return [(self.parents, person_id, related_id), (self.children, related_id, person_id)]
+        if rel_type == "spouse":
+            return [(self.spouses, person_id, related_id), (self.spouses, related_id, person_id)]
+        return []
+
+    def add_edge(self, person_id, related_id, rel_type):
+        for index, key, value in self._edges_for(person_id, related_id, rel_type):
+            self._link(index, key, value)
+        self.version += 1
+
+    def remove_edge(self, person_id, related_id, rel_type):
+        for index, key, value in self._edges_for(person_id, related_id, rel_type):
+            self._unlink(index, key, value)
+        self.version += 1
+
+    # -------------------------
+    # LOOKUPS
+    # -------------------------
+    def parents_of(self, person_id):
+        return self.parents.get(person_id, ())
+
+    def children_of(self, person_id):
+        return self.children.get(person_id, ())
+
+    def spouses_of(self, person_id):
+        return self.spouses.get(person_id, ())
+
+    def neighbours(self, person_id):
+        yield from self.parents_of(person_id)
+        yield from self.children_of(person_id)
+        yield from self.spouses_of(person_id)
+
+    def typed_neighbours(self, person_id):
+        """Yield (neighbour_id, edge_type) where edge_type is what the neighbour is to person_id."""
+        for pid in self.parents_of(person_id):
+            yield pid, "parent"
+        for pid in self.children_of(person_id):
+            yield pid, "child"
+        for pid in self.spouses_of(person_id):
+            yield pid, "spouse"
+
+
+_graphs = {}
+_lock = Lock()
+
+
+def data_version(family_id):
+    """The family's current Family.data_version (None if it is gone)."""
+    return Family.objects.filter(pk=family_id).values_list("data_version", flat=True).first()
+
+
+def get_family_graph(family_id):
+    """
+    Return the family's graph snapshot, reloading it when the family's
+    data_version has moved on. Every process keeps its own snapshot, so
+    the version (bumped on each Person/Relationship write, whichever
+    process made it) is what tells this one that its copy is stale.
+    """
+    version = data_version(family_id)
+    graph = _graphs.get(family_id)
+    if graph is None or graph.data_version != version:
+        with _lock:
+            graph = _graphs.get(family_id)
+            if graph is None or graph.data_version != version:
+                # Read before the edges: a write landing in between leaves
+                # the snapshot marked older than it is, so it is reloaded.
+                graph = _graphs[family_id] = FamilyGraph.load(family_id, version)
+    return graph
+
+
+def invalidate_family_graph(family_id):
+    with _lock:
+        _graphs.pop(family_id, None)
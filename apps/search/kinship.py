@@ -0,0 +1,119 @@
+"""
+Turn a relationship path (a list of edge types) into an English kinship
+term such as "great-aunt" or "second cousin once removed".
+
+Edge types follow algorithms.relationship_path: each entry says what the
+next person on the path is to the previous one ("parent", "child" or
+"spouse"). Labels describe the last person relative to the first.
+"""
+
+ORDINALS = [
+    "", "first", "second", "third", "fourth", "fifth",
+    "sixth", "seventh", "eighth", "ninth", "tenth",
+]
+
+REMOVED = {1: "once", 2: "twice", 3: "thrice"}
+
+# (male, female, unknown)
+TERMS = {
+    "parent": ("father", "mother", "parent"),
+    "child": ("son", "daughter", "child"),
+    "sibling": ("brother", "sister", "sibling"),
+    "pibling": ("uncle", "aunt", "uncle or aunt"),
+    "nibling": ("nephew", "niece", "nephew or niece"),
+    "spouse": ("husband", "wife", "spouse"),
+}
+
+
+def _word(kind, gender):
+    male, female, unknown = TERMS[kind]
+    if gender == "male":
+        return male
+    if gender == "female":
+        return female
+    return unknown
+
+
+def _greats(count):
+    if count <= 0:
+        return ""
+    if count <= 3:
+        return "great-" * count
+    return f"{count}x great-"
+
+
+def _ordinal(n):
+    return ORDINALS[n] if n < len(ORDINALS) else f"{n}th"
+
+
+def blood_label(up, down, gender=None):
+    """Label for `up` generations to a common ancestor, then `down` again."""
+    if up == 0 and down == 0:
+        return "self"
+    if down == 0:
+        if up == 1:
+            return _word("parent", gender)
+        return _greats(up - 2) + "grand" + _word("parent", gender)
+    if up == 0:
+        if down == 1:
+            return _word("child", gender)
+        return _greats(down - 2) + "grand" + _word("child", gender)
+    if up == 1 and down == 1:
+        return _word("sibling", gender)
+    if up == 1:
+        return _greats(down - 2) + _word("nibling", gender)
+    if down == 1:
+        return _greats(up - 2) + _word("pibling", gender)
+
+    degree = min(up, down) - 1
+    removed = abs(up - down)
+    label = f"{_ordinal(degree)} cousin"
+    if removed:
+        label += f" {REMOVED.get(removed, f'{removed} times')} removed"
+    return label
+
+
+def kinship_label(edges, gender=None):
+    """
+    Describe the person at the end of `edges` relative to the start.
+    `gender` is the gender of the person at the end of the path.
+    """
+    edges = list(edges)
+    lead_spouse = bool(edges) and edges[0] == "spouse"
+    if lead_spouse:
+        edges = edges[1:]
+    trail_spouse = bool(edges) and edges[-1] == "spouse"
+    if trail_spouse:
+        edges = edges[:-1]
+
+    # The blood part must be a climb to a common ancestor and a descent from it
+    up = 0
+    while up < len(edges) and edges[up] == "parent":
+        up += 1
+    down = len(edges) - up
+    if any(edge != "child" for edge in edges[up:]):
+        return "relative by marriage" if "spouse" in edges or lead_spouse or trail_spouse else "relative"
+
+    if not lead_spouse and not trail_spouse:
+        return blood_label(up, down, gender)
+    if lead_spouse and trail_spouse:
+        return "relative by marriage"
+
+    if up == 0 and down == 0:
+        return _word("spouse", gender)
+
+    core = blood_label(up, down, gender)
+    if lead_spouse:
+        # spouse's child -> stepchild, spouse's parent/sibling -> in-law
+        if up == 0:
+            return "step" + core
+        if down == 0 or (up == 1 and down == 1):
+            return core + "-in-law"
+        return core + " by marriage"
+
+    # parent's spouse -> stepparent, child's spouse/sibling's spouse -> in-law
+    if down == 0:
+        return "step" + core
+    if up == 0 or (up == 1 and down == 1):
+        return core + "-in-law"
+    return core + " by marriage"
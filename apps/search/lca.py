@@ -0,0 +1,95 @@
+from threading import Lock
+
+from .graph import get_family_graph
+
+
+class LCAIndex:
+    """
+    Lowest-common-ancestor index over a family's parent/child graph.
+
+    Binary lifting and Euler tours assume every node has one parent; in a
+    family graph everyone has two, so instead each person's full ancestor
+    set ({ancestor id: generations up}) is built once, bottom-up from the
+    parents' sets, and memoised. A query is then a dict intersection over
+    the smaller of the two sets, with no graph walk at all.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.graph_version = graph.version
+        self._ancestors = {}
+
+    @property
+    def is_current(self):
+        return self.graph_version == self.graph.version
+
+    def ancestors(self, person_id):
+        """Return {ancestor id: shortest generation distance}, including person_id at 0."""
+        memo = self._ancestors
+        if person_id in memo:
+            return memo[person_id]
+
+        # Iterative post-order walk so deep pedigrees cannot hit the recursion limit
+        stack = [(person_id, False)]
+        in_progress = set()
+        while stack:
+            current, parents_done = stack.pop()
+            if current in memo:
+                continue
+            parents = self.graph.parents_of(current)
+            if not parents_done:
+                in_progress.add(current)
+                stack.append((current, True))
+                # A parent still in progress means a loop in the data; skip that edge
+                stack.extend((p, False) for p in parents if p not in memo and p not in in_progress)
+                continue
+
+            merged = {current: 0}
+            for parent in parents:
+                for ancestor, depth in memo.get(parent, {}).items():
+                    if ancestor == current:
+                        continue
+                    if depth + 1 < merged.get(ancestor, depth + 2):
+                        merged[ancestor] = depth + 1
+            memo[current] = merged
+            in_progress.discard(current)
+        return memo[person_id]
+
+    def common_ancestors(self, a_id, b_id):
+        """
+        Lowest common ancestors of two people, nearest first.
+        Returns a list of (ancestor id, generations from a, generations from b).
+        """
+        anc_a = self.ancestors(a_id)
+        anc_b = self.ancestors(b_id)
+        small, large = (anc_a, anc_b) if len(anc_a) <= len(anc_b) else (anc_b, anc_a)
+        common = {pid for pid in small if pid in large}
+
+        # Drop anyone who is an ancestor of another common ancestor
+        lowest = set(common)
+        for pid in common:
+            if pid in lowest:
+                lowest.difference_update(a for a in self.ancestors(pid) if a != pid)
+
+        return sorted(
+            ((pid, anc_a[pid], anc_b[pid]) for pid in lowest),
+            key=lambda row: (row[1] + row[2], row[1], row[0]),
+        )
+
+
+_indexes = {}
+_lock = Lock()
+
+
+def get_lca_index(family_id):
+    """Return the LCA index for a family, rebuilding it if its graph changed."""
+    graph = get_family_graph(family_id)
+    index = _indexes.get(family_id)
+    if index is None or index.graph is not graph or not index.is_current:
+        with _lock:
+            index = _indexes[family_id] = LCAIndex(graph)
+    return index
+
+
+def common_ancestors(family_id, a_id, b_id):
+    return get_lca_index(family_id).common_ancestors(a_id, b_id)
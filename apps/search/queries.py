@@ -0,0 +1,61 @@
+from apps.persons.models import Person
+from apps.relationships.models import Relationship
+
+# Walks one edge type away from the root with a single recursive query.
+# UNION (not UNION ALL) keeps one row per (person, depth), so an ancestor
+# reached along several lines (pedigree collapse) is not multiplied per
+# path; the work stays within ancestors x depth. A bad edge that closes a
+# loop only repeats until max_depth.
+LINEAGE_SQL = """
+WITH RECURSIVE lineage(person_id, depth) AS (
+    SELECT r.related_person_id, 1
+    FROM {rel_table} r
+    WHERE r.person_id = %(root)s AND r.relationship_type = %(edge)s
+  UNION
+    SELECT r.related_person_id, l.depth + 1
+    FROM lineage l
+    JOIN {rel_table} r
+      ON r.person_id = l.person_id AND r.relationship_type = %(edge)s
+    WHERE l.depth < %(max_depth)s
+)
+SELECT p.*, g.generation
+FROM {person_table} p
+JOIN (
+    SELECT person_id, MIN(depth) AS generation
+    FROM lineage
+    WHERE person_id <> %(root)s
+    GROUP BY person_id
+) g ON g.person_id = p.id
+ORDER BY g.generation, p.last_name, p.first_name
+"""
+
+# Upper bound used when the caller does not limit the depth.
+MAX_LINEAGE_DEPTH = 256
+
+
+def _lineage(person, edge, max_depth=None):
+    sql = LINEAGE_SQL.format(
+        rel_table=Relationship._meta.db_table,
+        person_table=Person._meta.db_table,
+    )
+    params = {
+        "root": person.pk,
+        "edge": edge,
+        "max_depth": max(1, min(max_depth or MAX_LINEAGE_DEPTH, MAX_LINEAGE_DEPTH)),
+    }
+    return list(Person.objects.raw(sql, params))
+
+
+def ancestors_with_depth(person, max_depth=None):
+    """
+    Return every ancestor of `person` in one query.
+    Each Person carries a `generation` attribute (1 = parent, 2 = grandparent, ...).
+    """
+    # "child" rows point from a person to their parent
+    return _lineage(person, "child", max_depth)
+
+
+def descendants_with_depth(person, max_depth=None):
+    """Return every descendant of `person` in one query, with `generation` set."""
+    # "parent" rows point from a person to their child
+    return _lineage(person, "parent", max_depth)
@@ -1,13 +1,190 @@
-def apply_person_filters(queryset, filters):
-    if gender := filters.get("gender"):
-        queryset = queryset.filter(gender=gender)
+import re
+from array import array
+from contextlib import contextmanager
 
-    if alive := filters.get("alive"):
-        if alive.lower() in ["true", "false"]:
-            queryset = queryset.filter(is_alive=(alive.lower() == "true"))
+from django.conf import settings
+from django.contrib.postgres.search import SearchRank, TrigramSimilarity, TrigramWordSimilarity
+from django.db import connection, transaction
+from django.db.models import F, FloatField, Q, Value, Window
+from django.db.models.functions import Cast, Coalesce, Concat, Greatest, RowNumber
 
-    if start_year := filters.get("start_year"):
-        if end_year := filters.get("end_year"):
-            queryset = queryset.filter(birth_year__range=(start_year, end_year))
+from apps.persons.pagination import keyset_filter
+from apps.persons.search import build_search_query
+from .cache import hydrate, locate, result_cache
 
-    return queryset
+FULL_NAME = Concat(
+    "first_name", Value(" "),
+    Coalesce("middle_name", Value("")), Value(" "),
+    "last_name",
+)
+
+
+# Words of a fuzzy query matched separately against the name columns
+MAX_FUZZY_WORDS = 5
+
+
+@contextmanager
+def _word_similarity_threshold(threshold):
+    """
+    Run the block in a transaction whose `%>` operator cuts off at
+    `threshold` instead of pg_trgm's default word_similarity_threshold (0.6).
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)", [str(threshold)])
+        yield
+
+
+def fuzzy_person_search(queryset, query, threshold=0.3, cursor=None, limit=25, cache_key=None):
+    """
+    Rank people by trigram similarity to `query` across first, middle and
+    last name. Returns (page of persons with a `score`, sort key of the
+    last row or None when there are no more results). With a `cache_key`
+    the ranked id list is cached (see search.cache) and only the page's
+    rows are loaded.
+
+    The `%>` (word similarity) pre-filter on each name column is what lets
+    PostgreSQL use the gin_trgm_ops indexes; the score and `threshold`
+    are applied on the much smaller candidate set. Each word of the query
+    is pre-filtered on its own, so "jon smyth" still reaches the
+    full-name score, and the operator's cut-off is set to `threshold`.
+    """
+    words = query.split()[:MAX_FUZZY_WORDS] or [query]
+    match = Q()
+    for word in words:
+        for column in ("first_name", "middle_name", "last_name"):
+            match |= Q(**{f"{column}__trigram_word_similar": word})
+    queryset = queryset.filter(match).annotate(score=_name_similarity(query)).filter(score__gte=threshold)
+    with _word_similarity_threshold(threshold):
+        return _ranked_page(queryset, cursor, limit, cache_key)
+
+
+PHONETIC_COLUMNS = ["first_name_dm", "first_name_dm_alt", "last_name_dm", "last_name_dm_alt"]
+
+
+def _phonetic_codes(words):
+    """
+    {primary, alternate} Double Metaphone codes of each word, in one
+    query. Empty codes are dropped: they would match every person whose
+    stored code is empty too (a blank last name, say).
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT dmetaphone(w), dmetaphone_alt(w) FROM unnest(%s::text[]) WITH ORDINALITY AS t(w, n) ORDER BY n",
+            [list(words)],
+        )
+        return [{code for code in row if code} for row in cursor.fetchall()]
+
+
+def phonetic_person_search(queryset, query, cursor=None, limit=25, cache_key=None):
+    """
+    "Sounds like" search: every word of `query` must share a Double
+    Metaphone code (primary or alternate) with the first or last name, so
+    Smyth finds Smith and Schmidt. Each lookup is an equality on an
+    indexed code column; matches are then ranked by trigram similarity.
+    Words without a code are ignored. Same return value as
+    fuzzy_person_search.
+    """
+    words = re.findall(r"[^\W\d_]+", query)
+    codes_per_word = [codes for codes in _phonetic_codes(words) if codes] if words else []
+    if not codes_per_word:
+        return [], None
+    for codes in codes_per_word:
+        match = Q()
+        for column in PHONETIC_COLUMNS:
+            match |= Q(**{f"{column}__in": sorted(codes)})
+        queryset = queryset.filter(match)
+    queryset = queryset.annotate(score=_name_similarity(query))
+    return _ranked_page(queryset, cursor, limit, cache_key)
+
+
+def fulltext_person_search(queryset, text, cursor=None, limit=25, cache_key=None):
+    """
+    Ranked search over the stored, weighted Person.search_vector.
+    Quoted input is a phrase search, bare words are prefix matches
+    (see persons.search.build_search_query). Same return value as
+    fuzzy_person_search.
+    """
+    query = build_search_query(text)
+    if query is None:
+        return [], None
+    queryset = queryset.filter(search_vector=query).annotate(
+        score=Cast(SearchRank(F("search_vector"), query), FloatField())
+    )
+    return _ranked_page(queryset, cursor, limit, cache_key)
+
+
+def global_person_search(queryset, text, per_family=5):
+    """
+    Full-text search over people in several families at once, in a single
+    query. Each family contributes at most `per_family` results (ranked by
+    a ROW_NUMBER() window partitioned by family). Returns
+    [{"family": Family, "results": [persons with `score`]}], families with
+    the best match first.
+    """
+    query = build_search_query(text)
+    if query is None:
+        return []
+    queryset = queryset.filter(search_vector=query).annotate(
+        score=Cast(SearchRank(F("search_vector"), query), FloatField())
+    ).annotate(
+        family_rank=Window(
+            RowNumber(),
+            partition_by=F("family_id"),
+            order_by=[F("score").desc(), F("id").asc()],
+        )
+    ).filter(family_rank__lte=per_family).select_related("family").order_by("-score", "id")
+
+    groups = {}
+    for person in queryset:
+        group = groups.setdefault(person.family_id, {"family": person.family, "results": []})
+        group["results"].append(person)
+    return list(groups.values())
+
+
+def _name_similarity(query):
+    return Cast(Greatest(
+        TrigramSimilarity("first_name", query),
+        TrigramSimilarity("last_name", query),
+        TrigramWordSimilarity(query, FULL_NAME),
+    ), FloatField())
+
+
+def _ranked_ids(queryset):
+    limit = settings.SEARCH_RESULT_CACHE_MAX_IDS
+    rows = list(queryset.values_list("id", "score")[:limit + 1])
+    if len(rows) > limit:
+        return None
+    return array("q", (r[0] for r in rows)), array("d", (r[1] for r in rows))
+
+
+def _ranked_page(queryset, cursor, limit, cache_key=None):
+    """One page of `queryset` ordered by (score desc, id), after `cursor`."""
+    order = ["-score", "id"]
+    if not (cursor and len(cursor) == len(order) and all(isinstance(v, (int, float)) for v in cursor)):
+        cursor = None
+
+    if cache_key is not None:
+        cached = result_cache.get_or_build(cache_key, lambda: _ranked_ids(queryset.order_by(*order)))
+        # The id is the last cursor key; a cursor from an older result set
+        # that no longer contains it falls through to the database.
+        start = 0 if cursor is None or cached is None else locate(cached[0], cursor[-1])
+        if cached is not None and start is not None:
+            if cursor is not None:
+                start += 1
+            ids, scores = cached
+            page = hydrate(queryset.model.objects.all(), ids[start:start + limit])
+            score_of = dict(zip(ids[start:start + limit], scores[start:start + limit]))
+            for person in page:
+                person.score = score_of[person.id]
+            if start + limit >= len(ids) or not page:
+                return page, None
+            return page, [page[-1].score, page[-1].id]
+
+    if cursor is not None:
+        queryset = queryset.filter(keyset_filter(order, cursor))
+
+    page = list(queryset.order_by(*order)[:limit + 1])
+    if len(page) <= limit:
+        return page, None
+    page = page[:limit]
+    return page, [page[-1].score, page[-1].id]
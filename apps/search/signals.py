@@ -0,0 +1,26 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.persons.models import Person
+from apps.relationships.models import Relationship
+from . import autocomplete
+from .graph import invalidate_family_graph
+
+
+@receiver(post_save, sender=Relationship)
+@receiver(post_delete, sender=Relationship)
+def drop_graph_on_relationship_change(sender, instance, **kwargs):
+    """
+    Free this process's snapshot early. Other processes notice the change
+    through Family.data_version the next time they ask for the graph.
+    """
+    family_id = instance.family_id
+    transaction.on_commit(lambda: invalidate_family_graph(family_id))
+
+
+@receiver(post_save, sender=Person)
+@receiver(post_delete, sender=Person)
+def invalidate_autocomplete_on_person_change(sender, instance, **kwargs):
+    family_id = instance.family_id
+    transaction.on_commit(lambda: autocomplete.invalidate(family_id))
@@ -1,3 +1,54 @@
-from django.test import TestCase
+from django.test import SimpleTestCase
 
-# Create your tests here.
+from .kinship import blood_label, kinship_label
+
+
+class BloodLabelTests(SimpleTestCase):
+    def test_direct_line(self):
+        self.assertEqual(blood_label(0, 0), "self")
+        self.assertEqual(blood_label(1, 0, "male"), "father")
+        self.assertEqual(blood_label(2, 0, "female"), "grandmother")
+        self.assertEqual(blood_label(4, 0), "great-great-grandparent")
+        self.assertEqual(blood_label(0, 1, "female"), "daughter")
+        self.assertEqual(blood_label(0, 3, "male"), "great-grandson")
+        self.assertEqual(blood_label(6, 0), "4x great-grandparent")
+
+    def test_siblings_and_collaterals(self):
+        self.assertEqual(blood_label(1, 1, "male"), "brother")
+        self.assertEqual(blood_label(2, 1, "female"), "aunt")
+        self.assertEqual(blood_label(3, 1, "male"), "great-uncle")
+        self.assertEqual(blood_label(1, 2, "female"), "niece")
+        self.assertEqual(blood_label(1, 3), "great-nephew or niece")
+
+    def test_cousins(self):
+        self.assertEqual(blood_label(2, 2), "first cousin")
+        self.assertEqual(blood_label(3, 3), "second cousin")
+        self.assertEqual(blood_label(2, 3), "first cousin once removed")
+        self.assertEqual(blood_label(6, 3), "second cousin thrice removed")
+        self.assertEqual(blood_label(2, 7), "first cousin 5 times removed")
+        self.assertEqual(blood_label(13, 13), "12th cousin")
+
+
+class KinshipLabelTests(SimpleTestCase):
+    def test_blood_paths(self):
+        self.assertEqual(kinship_label([]), "self")
+        self.assertEqual(kinship_label(["parent", "parent"], "male"), "grandfather")
+        self.assertEqual(kinship_label(["parent", "child"], "female"), "sister")
+        self.assertEqual(kinship_label(["parent", "parent", "child", "child"]), "first cousin")
+
+    def test_spouse_and_step_relations(self):
+        self.assertEqual(kinship_label(["spouse"], "female"), "wife")
+        self.assertEqual(kinship_label(["spouse", "child"], "male"), "stepson")
+        self.assertEqual(kinship_label(["parent", "spouse"], "female"), "stepmother")
+
+    def test_in_laws(self):
+        self.assertEqual(kinship_label(["spouse", "parent"], "male"), "father-in-law")
+        self.assertEqual(kinship_label(["spouse", "parent", "child"], "female"), "sister-in-law")
+        self.assertEqual(kinship_label(["child", "spouse"], "female"), "daughter-in-law")
+        self.assertEqual(kinship_label(["parent", "child", "spouse"], "male"), "brother-in-law")
+        self.assertEqual(kinship_label(["spouse", "parent", "parent", "child"], "male"), "uncle by marriage")
+
+    def test_paths_that_are_not_one_climb_and_descent(self):
+        self.assertEqual(kinship_label(["child", "parent"]), "relative")
+        self.assertEqual(kinship_label(["parent", "spouse", "child"]), "relative by marriage")
+        self.assertEqual(kinship_label(["spouse", "child", "spouse"]), "relative by marriage")
@@ -1,18 +1,26 @@
 from django.urls import path
 from .views import (
     PersonSearchView,
+    GlobalSearchView,
     PersonFilterView,
     PersonAutocompleteView,
     RelationshipPathView,
     AncestorsView,
+    CommonAncestorsView,
+    BatchRelationshipPathView,
+    SearchCacheStatsView,
 )
 
 app_name = "search"
 
 urlpatterns = [
+    path("all/", GlobalSearchView.as_view(), name="global_search"),
+    path("cache-stats/", SearchCacheStatsView.as_view(), name="cache_stats"),
     path("<int:family_id>/persons/", PersonSearchView.as_view(), name="person_search"),
     path("<int:family_id>/filters/", PersonFilterView.as_view(), name="filters"),
     path("<int:family_id>/autocomplete/", PersonAutocompleteView.as_view(), name="autocomplete"),
     path("<int:family_id>/path/<int:start_id>/<int:end_id>/", RelationshipPathView.as_view(), name="path"),
+    path("<int:family_id>/paths/", BatchRelationshipPathView.as_view(), name="batch_paths"),
     path("<int:family_id>/person/<int:person_id>/relations/", AncestorsView.as_view(), name="person_relations"),
+    path("<int:family_id>/common-ancestors/<int:person_a>/<int:person_b>/", CommonAncestorsView.as_view(), name="common_ancestors"),
 ]
@@ -1,19 +1,37 @@
+import json
+import time
+from collections import defaultdict
+
+from django.conf import settings
 from django.views.generic import TemplateView, View
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
-from django.contrib.postgres.search import SearchVector, SearchQuery, SearchRank
+from django.http import JsonResponse, StreamingHttpResponse
 from apps.persons.models import Person
-from apps.families.models import Family
-from .services import apply_person_filters
-from .algorithms import bfs_relationship_path, dfs_ancestors, dfs_descendants
+from apps.persons.pagination import (
+    KeysetPaginationMixin, decode_cursor, encode_cursor, paginate_keyset,
+)
+from apps.families.models import Family, FamilyMembership
+from .services import (
+    fulltext_person_search, fuzzy_person_search, global_person_search, phonetic_person_search,
+)
+from .filters import PersonFilter
+from .cache import CachedKeysetPaginator, make_key, result_cache
+from .algorithms import PathSearch, relationship_path
+from .kinship import blood_label, kinship_label
+from .lca import common_ancestors
+from .autocomplete import autocomplete
+from .graph import get_family_graph
+from .queries import ancestors_with_depth, descendants_with_depth
 from django.views.generic import ListView
 from django.contrib.auth.mixins import LoginRequiredMixin
 
 
-class PersonSearchView(LoginRequiredMixin, ListView):
+class PersonSearchView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = Person
     template_name = 'search/person_search.html'
     context_object_name = 'members'
+    paginate_by = 50
+    ranked_page_size = 25
 
     def get_queryset(self):
         # Ensure the logged-in user belongs to the family
@@ -27,39 +45,149 @@ class PersonSearchView(LoginRequiredMixin, ListView):
         queryset = Person.objects.filter(family=self.family)
 
         # Apply search query
-        query = self.request.GET.get('q')
+        query = " ".join(self.request.GET.get('q', '').split())
+        self.mode = self.request.GET.get('mode', 'contains')
+        self.next_cursor = None
+        # Result id lists are cached per family data version (see search.cache)
+        params = [('threshold', self.get_threshold())] if self.mode == 'fuzzy' else []
+        self.cache_key = make_key(self.family.id, self.family.data_version, self.mode, query, params)
+        if query and self.mode in ('fuzzy', 'fulltext', 'phonetic'):
+            cursor = decode_cursor(self.request.GET.get('cursor'))
+            if self.mode == 'fuzzy':
+                page, last_key = fuzzy_person_search(
+                    queryset,
+                    query,
+                    threshold=self.get_threshold(),
+                    cursor=cursor,
+                    limit=self.ranked_page_size,
+                    cache_key=self.cache_key,
+                )
+            elif self.mode == 'phonetic':
+                page, last_key = phonetic_person_search(
+                    queryset, query, cursor=cursor, limit=self.ranked_page_size, cache_key=self.cache_key
+                )
+            else:
+                page, last_key = fulltext_person_search(
+                    queryset, query, cursor=cursor, limit=self.ranked_page_size, cache_key=self.cache_key
+                )
+            self.next_cursor = encode_cursor(last_key) if last_key else None
+            return page
         if query:
             queryset = queryset.filter(first_name__icontains=query)  # or name field
         return queryset
 
+    def get_keyset_paginator(self, queryset, page_size):
+        return CachedKeysetPaginator(queryset, self.cache_key, self.keyset_ordering, page_size)
+
+    def get_paginate_by(self, queryset):
+        # Ranked modes page themselves by (score, id)
+        if isinstance(queryset, list):
+            return None
+        return self.paginate_by
 
+    def get_threshold(self):
+        try:
+            threshold = float(self.request.GET.get('threshold', settings.SEARCH_TRIGRAM_THRESHOLD))
+        except ValueError:
+            threshold = settings.SEARCH_TRIGRAM_THRESHOLD
+        return min(max(threshold, 0.0), 1.0)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['family'] = self.family
         context['query'] = self.request.GET.get('q', '')
+        context['mode'] = self.mode
+        context['next_cursor'] = self.next_cursor
+        return context
+
+
+class GlobalSearchView(LoginRequiredMixin, TemplateView):
+    """
+    Search every family the user belongs to at once. The page costs a
+    fixed two queries however many families there are: one for the
+    memberships and one ranked, per-family-capped search.
+    """
+    template_name = "search/global_search.html"
+    default_per_family = 5
+    max_per_family = 20
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get("q", "").strip()
+        try:
+            per_family = int(self.request.GET.get("per_family", self.default_per_family))
+        except ValueError:
+            per_family = self.default_per_family
+        per_family = max(1, min(per_family, self.max_per_family))
+
+        groups = []
+        if query:
+            family_ids = list(
+                FamilyMembership.objects.filter(user=self.request.user).values_list("family_id", flat=True)
+            )
+            if family_ids:
+                groups = global_person_search(
+                    Person.objects.filter(family_id__in=family_ids), query, per_family
+                )
+        context["query"] = query
+        context["per_family"] = per_family
+        context["groups"] = groups
         return context
 
 
-class PersonFilterView(TemplateView):
+class PersonFilterView(LoginRequiredMixin, TemplateView):
+    """
+    Faceted filtering of a family's members. The page of results and the
+    counts for every facet option come back together; the counts are one
+    aggregate query however many options there are.
+    """
     template_name = "search/filter_results.html"
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        family_id = self.kwargs["family_id"]
-        persons = Person.objects.filter(family_id=family_id)
-        persons = apply_person_filters(persons, self.request.GET)
-        context["persons"] = persons
+        family = get_object_or_404(
+            Family, id=self.kwargs["family_id"], memberships__user=self.request.user
+        )
+        persons = Person.objects.filter(family=family)
+        person_filter = PersonFilter(self.request.GET)
+        results = person_filter.apply(persons)
+        cache_key = make_key(family.id, family.data_version, "filter", params=person_filter.cache_params())
+        page = paginate_keyset(
+            self.request, results, paginator=CachedKeysetPaginator(results, cache_key)
+        )
+        context["family"] = family
+        context["filter"] = person_filter
+        context["facets"] = person_filter.facet_counts(persons)
+        context["persons"] = page.object_list
+        context["page_obj"] = page
         return context
 
 
-class PersonAutocompleteView(View):
+class PersonAutocompleteView(LoginRequiredMixin, View):
+    """
+    Prefix match on first, middle or last name from an in-memory index.
+    Responses for a given term are briefly cacheable, so a debounced
+    client that repeats a term is served by the browser.
+    """
+    default_limit = 10
+    max_limit = 50
+
     def get(self, request, family_id, *args, **kwargs):
+        get_object_or_404(Family, id=family_id, memberships__user=request.user)
         term = request.GET.get("term", "")
-        persons = Person.objects.filter(family_id=family_id, first_name__icontains=term)[:10]
+        try:
+            limit = int(request.GET.get("limit", self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = max(1, min(limit, self.max_limit))
+
+        matches = autocomplete(family_id, term, limit)
+        results = [{"id": pid, "label": label, "value": label} for pid, label in matches]
+        response = JsonResponse(results, safe=False)
+        response["Cache-Control"] = "private, max-age=30"
+        return response
+
 
-        results = [{"id": p.id, "label": str(p), "value": str(p)} for p in persons]
-        return JsonResponse(results, safe=False)
 class RelationshipPathView(TemplateView):
     template_name = "search/relationship_path.html"
 
@@ -68,19 +196,151 @@ class RelationshipPathView(TemplateView):
         start_id = self.kwargs["start_id"]
         end_id = self.kwargs["end_id"]
 
-        start = get_object_or_404(Person, id=start_id)
-        end = get_object_or_404(Person, id=end_id)
+        family_id = self.kwargs["family_id"]
+
+        start = get_object_or_404(Person, id=start_id, family_id=family_id)
+        end = get_object_or_404(Person, id=end_id, family_id=family_id)
 
-        path = bfs_relationship_path(start, end)
-        context.update({"path": path})
+        found = relationship_path(get_family_graph(family_id), start.id, end.id)
+        if found is None:
+            context.update({"path": None, "start": start, "end": end})
+            return context
+
+        person_ids, edges = found
+        persons = Person.objects.in_bulk(person_ids)
+        path = [persons[pid] for pid in person_ids]
+        context.update({
+            "path": path,
+            "start": start,
+            "end": end,
+            # (person, what they are to the previous person on the path)
+            "steps": list(zip(path[1:], edges)),
+            "kinship": kinship_label(edges, end.gender),
+        })
         return context
+
+
 class AncestorsView(TemplateView):
     template_name = "search/ancestors_descendants.html"
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        person = get_object_or_404(Person, id=self.kwargs["person_id"])
-        context["ancestors"] = dfs_ancestors(person)
-        context["descendants"] = dfs_descendants(person)
+        person = get_object_or_404(
+            Person, id=self.kwargs["person_id"], family_id=self.kwargs["family_id"]
+        )
+        try:
+            max_depth = int(self.request.GET.get("depth", "")) or None
+        except ValueError:
+            max_depth = None
+
+        # One recursive query per direction, however deep the tree is
+        context["ancestors"] = ancestors_with_depth(person, max_depth=max_depth)
+        context["descendants"] = descendants_with_depth(person, max_depth=max_depth)
         context["person"] = person
         return context
+
+
+class SearchCacheStatsView(LoginRequiredMixin, View):
+    """Hit/miss counters and memory use of this process's search result cache, for staff."""
+
+    def get(self, request):
+        if not request.user.is_staff:
+            return JsonResponse({"error": "Permission denied."}, status=403)
+        return JsonResponse(result_cache.stats())
+
+
+class CommonAncestorsView(LoginRequiredMixin, View):
+    """JSON: lowest common ancestors of two people and how they are related."""
+
+    def get(self, request, family_id, person_a, person_b):
+        family = get_object_or_404(Family, id=family_id, memberships__user=request.user)
+        persons = Person.objects.filter(family=family).in_bulk([person_a, person_b])
+        if person_a not in persons or person_b not in persons:
+            return JsonResponse({"error": "Person not found in this family."}, status=404)
+
+        found = common_ancestors(family.id, person_a, person_b)
+        names = Person.objects.in_bulk([pid for pid, _, _ in found])
+        b = persons[person_b]
+
+        return JsonResponse({
+            "person_a": person_a,
+            "person_b": person_b,
+            "common_ancestors": [
+                {
+                    "id": pid,
+                    "name": str(names[pid]),
+                    "generations_from_a": up,
+                    "generations_from_b": down,
+                }
+                for pid, up, down in found
+            ],
+            # b relative to a, through the nearest common ancestor
+            "relationship": blood_label(found[0][1], found[0][2], b.gender) if found else None,
+        })
+
+
+class BatchRelationshipPathView(LoginRequiredMixin, View):
+    """
+    POST {"pairs": [[start_id, end_id], ...]} and receive one JSON line per
+    pair as soon as its path is known. Pairs sharing a start reuse the same
+    BFS frontier, and the family graph is loaded once for the whole batch.
+
+    Callers authenticate with the site's session cookie, so CSRF protection
+    applies as to any other POST: scripts must log in, keep the `csrftoken`
+    cookie and echo it in an X-CSRFToken header. The view is deliberately
+    not csrf_exempt; there is no token-based auth to fall back on.
+    """
+    max_pairs = 500
+    time_budget = 10.0  # seconds
+
+    def post(self, request, family_id):
+        family = get_object_or_404(Family, id=family_id, memberships__user=request.user)
+        try:
+            pairs = [(int(s), int(e)) for s, e in json.loads(request.body)["pairs"]]
+        except (ValueError, KeyError, TypeError):
+            return JsonResponse({"error": "Expected {\"pairs\": [[start_id, end_id], ...]}."}, status=400)
+        if len(pairs) > self.max_pairs:
+            return JsonResponse({"error": f"At most {self.max_pairs} pairs per request."}, status=400)
+
+        response = StreamingHttpResponse(
+            self.stream(family, pairs), content_type="application/x-ndjson"
+        )
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    def stream(self, family, pairs):
+        deadline = time.monotonic() + self.time_budget
+        graph = get_family_graph(family.id)
+        ids = {pid for pair in pairs for pid in pair}
+        genders = dict(Person.objects.filter(family=family, id__in=ids).values_list("id", "gender"))
+
+        by_start = defaultdict(list)
+        for index, (start_id, end_id) in enumerate(pairs):
+            by_start[start_id].append((index, end_id))
+
+        timed_out = False
+        for start_id, targets in by_start.items():
+            search = PathSearch(graph, start_id)
+            for index, end_id in targets:
+                result = {"index": index, "start": start_id, "end": end_id}
+                if start_id not in genders or end_id not in genders:
+                    result["error"] = "Person not found in this family."
+                elif timed_out:
+                    result["error"] = "Time budget exceeded."
+                else:
+                    try:
+                        found = search.path_to(end_id, deadline=deadline)
+                    except TimeoutError:
+                        found, timed_out = None, True
+                        result["error"] = "Time budget exceeded."
+                    if found is not None:
+                        path, edges = found
+                        result.update({
+                            "path": path,
+                            "edges": edges,
+                            "kinship": kinship_label(edges, genders[end_id]),
+                        })
+                    elif not timed_out:
+                        result["path"] = None
+                    timed_out = timed_out or time.monotonic() > deadline
+                yield json.dumps(result) + "\n"
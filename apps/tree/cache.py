@@ -0,0 +1,59 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .services import build_tree
+
+STATS_KEYS = ("hits", "misses")
+
+
+def _cache():
+    return caches[getattr(settings, "TREE_CACHE_ALIAS", "default")]
+
+
+def tree_cache_key(family_id, person_id, max_depth, show_deceased, data_version):
+    # The family data version is part of the key, so any Person/Relationship
+    # write makes old entries unreachable instead of having to delete them.
+    return f"tree:{family_id}:{person_id}:{max_depth}:{int(show_deceased)}:v{data_version}"
+
+
+def tree_etag(cache_key):
+    return '"%s"' % hashlib.md5(cache_key.encode()).hexdigest()
+
+
+def _count(family_id, stat):
+    cache = _cache()
+    for key in (f"tree:stats:{stat}", f"tree:stats:{family_id}:{stat}"):
+        # add() is a no-op when the counter already exists
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # evicted between add() and incr()
+            cache.set(key, 1, timeout=None)
+
+
+def get_tree(person, max_depth, show_deceased, data_version):
+    """Return (tree dict, cache hit) for `person`, building it on a miss."""
+    cache = _cache()
+    key = tree_cache_key(person.family_id, person.id, max_depth, show_deceased, data_version)
+
+    data = cache.get(key)
+    if data is not None:
+        _count(person.family_id, "hits")
+        return data, True
+
+    _count(person.family_id, "misses")
+    data = build_tree(person, max_depth=max_depth, show_deceased=show_deceased)
+    cache.set(key, data)
+    return data, False
+
+
+def cache_stats(family_id=None):
+    prefix = f"tree:stats:{family_id}:" if family_id is not None else "tree:stats:"
+    values = _cache().get_many([prefix + stat for stat in STATS_KEYS])
+    stats = {stat: values.get(prefix + stat, 0) for stat in STATS_KEYS}
+    total = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / total, 4) if total else None
+    return stats
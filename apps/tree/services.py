@@ -1,27 +1,119 @@
+from django.db.models import Q
+
 from apps.relationships.models import Relationship
+from .serializers import person_to_node
+
+
+def _tree_node(person):
+    node = person_to_node(person)
+    node["children"] = []
+    node["has_more"] = False
+    return node
 
-def build_tree(person, depth=0, max_depth=3, show_deceased=True):
-    if depth > max_depth:
-        return {"id": person.id, "has_more": True}
 
-    children_rels = Relationship.objects.filter(
-        person=person,
+def _child_edges(parent_ids, show_deceased):
+    rels = Relationship.objects.filter(
+        person_id__in=list(parent_ids),
         relationship_type="parent"
-    ).select_related("related_person")
-
-    children = []
-    for rel in children_rels:
-        child = rel.related_person
-        if not show_deceased and not child.is_living:
-            continue
-
-        children.append(build_tree(child, depth + 1, max_depth, show_deceased))
-
-    return {
-        "id": person.id,
-        "name": str(person),
-        "gender": person.gender,
-        "is_living": person.is_living,
-        "children": children,
-        "has_more": len(children) == max_depth
-    }
+    )
+    if not show_deceased:
+        rels = rels.filter(related_person__is_living=True)
+    return rels
+
+
+def _grow(frontier, seen, levels, show_deceased):
+    """
+    Expand `frontier` ({person id: [nodes]}) by up to `levels` generations,
+    one query per generation, then flag cutoff nodes that have more children.
+    """
+    for _ in range(levels):
+        if not frontier:
+            break
+
+        rels = _child_edges(frontier, show_deceased).select_related(
+            "related_person"
+        ).order_by("related_person__first_name", "related_person__last_name")
+
+        next_frontier = {}
+        for rel in rels:
+            child = rel.related_person
+            for parent_node in frontier[rel.person_id]:
+                node = _tree_node(child)
+                parent_node["children"].append(node)
+                # A person reached twice (or through a bad loop) is only expanded once
+                if child.id not in seen:
+                    next_frontier.setdefault(child.id, []).append(node)
+
+        seen.update(next_frontier)
+        frontier = next_frontier
+
+    if frontier:
+        has_children = _child_edges(frontier, show_deceased).values_list(
+            "person_id", flat=True
+        ).distinct()
+        for person_id in has_children:
+            for node in frontier[person_id]:
+                node["has_more"] = True
+
+
+def build_tree(person, max_depth=3, show_deceased=True):
+    """
+    Build the nested descendant tree for `person`, one generation at a time.
+
+    Each generation is fetched with a single `person_id__in` query, so a
+    refresh costs max_depth + 1 queries regardless of how many people are
+    in the tree. Nodes at the depth cutoff get `has_more` when they have
+    (visible) children that were not loaded.
+    """
+    root = _tree_node(person)
+    _grow({person.id: [root]}, {person.id}, max_depth, show_deceased)
+    return root
+
+
+def encode_cursor(person_id, child_id):
+    return f"{person_id}:{child_id}"
+
+
+def decode_cursor(cursor):
+    try:
+        person_id, child_id = cursor.split(":")
+        return int(person_id), int(child_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def expand_subtrees(person_ids, depth=2, show_deceased=True, cursor=None, limit=200):
+    """
+    Load the next `depth` generations below each of `person_ids`.
+
+    The first generation is paged with a keyset cursor over
+    (parent id, child id) so a very wide sibling set comes back in slices
+    of `limit`; deeper generations are built with `_grow`. Returns
+    ({parent id: [child nodes]}, next_cursor or None).
+    """
+    rels = _child_edges(person_ids, show_deceased).select_related(
+        "related_person"
+    ).order_by("person_id", "related_person_id")
+
+    after = decode_cursor(cursor) if cursor else None
+    if after:
+        rels = rels.filter(
+            Q(person_id__gt=after[0]) |
+            Q(person_id=after[0], related_person_id__gt=after[1])
+        )
+
+    rels = list(rels[:limit + 1])
+    next_cursor = None
+    if len(rels) > limit:
+        rels = rels[:limit]
+        next_cursor = encode_cursor(rels[-1].person_id, rels[-1].related_person_id)
+
+    children = {person_id: [] for person_id in person_ids}
+    frontier = {}
+    for rel in rels:
+        node = _tree_node(rel.related_person)
+        children[rel.person_id].append(node)
+        frontier.setdefault(rel.related_person_id, []).append(node)
+
+    _grow(frontier, set(frontier) | set(person_ids), depth - 1, show_deceased)
+    return children, next_cursor
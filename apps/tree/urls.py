@@ -1,9 +1,11 @@
 from django.urls import path
-from .views import FamilyTreeView, CenteredTreeView, TreeDataAPIView
+from .views import FamilyTreeView, CenteredTreeView, TreeDataAPIView, TreeExpandAPIView, TreeCacheStatsView
 
 app_name = "tree_per_family"
 urlpatterns = [
     path("", FamilyTreeView.as_view(), name="view"),
     path("<int:person_id>/", CenteredTreeView.as_view(), name="tree_centered"),
     path("api/<int:person_id>/", TreeDataAPIView.as_view(), name="tree_data"),
+    path("api/expand/", TreeExpandAPIView.as_view(), name="tree_expand"),
+    path("api/cache-stats/", TreeCacheStatsView.as_view(), name="tree_cache_stats"),
 ]
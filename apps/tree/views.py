@@ -1,8 +1,11 @@
 from django.views.generic import TemplateView, View
 from django.shortcuts import get_object_or_404
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse
+from django.utils.http import parse_etags
+from apps.families.models import Family
 from apps.persons.models import Person
-from .services import build_tree
+from .cache import cache_stats, get_tree, tree_cache_key, tree_etag
+from .services import expand_subtrees
 
 class FamilyTreeView(TemplateView):
     template_name = "tree/tree_view.html"
@@ -26,8 +29,84 @@ class CenteredTreeView(FamilyTreeView):
 
 
 class TreeDataAPIView(View):
+    default_depth = 3
+    max_depth = 6
+
     def get(self, request, family_id, person_id):
         show_deceased = request.GET.get("show_deceased", "true") == "true"
-        person = get_object_or_404(Person, id=person_id, family_id=family_id)
-        data = build_tree(person, show_deceased=show_deceased)
-        return JsonResponse(data)
+        try:
+            max_depth = int(request.GET.get("depth", self.default_depth))
+        except ValueError:
+            max_depth = self.default_depth
+        max_depth = max(1, min(max_depth, self.max_depth))
+
+        person = get_object_or_404(
+            Person.objects.select_related("family"), id=person_id, family_id=family_id
+        )
+        data_version = person.family.data_version
+
+        # The ETag only depends on the cache key, so an unchanged family can
+        # be answered with 304 before the tree is even looked up.
+        etag = tree_etag(tree_cache_key(family_id, person.id, max_depth, show_deceased, data_version))
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            response = HttpResponse(status=304)
+            response["ETag"] = etag
+            return response
+
+        data, hit = get_tree(person, max_depth, show_deceased, data_version)
+        response = JsonResponse(data)
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        response["X-Cache"] = "HIT" if hit else "MISS"
+        return response
+
+
+class TreeCacheStatsView(View):
+    """Hit/miss counters of the tree cache, for family owners and admins."""
+
+    def get(self, request, family_id):
+        family = get_object_or_404(Family, id=family_id)
+        if not request.user.is_authenticated or not family.memberships.filter(
+            user=request.user, role__in=("owner", "admin")
+        ).exists():
+            return JsonResponse({"error": "Permission denied."}, status=403)
+
+        return JsonResponse({"family": cache_stats(family.id), "global": cache_stats()})
+
+
+class TreeExpandAPIView(View):
+    """
+    Return the next generations below a set of frontier nodes.
+    GET ?ids=1,2,3&depth=2&limit=200&cursor=...&show_deceased=true
+    """
+    max_ids = 100
+    max_depth = 5
+    max_limit = 500
+
+    def get(self, request, family_id):
+        show_deceased = request.GET.get("show_deceased", "true") == "true"
+        try:
+            ids = [int(i) for i in request.GET.get("ids", "").split(",") if i]
+            depth = int(request.GET.get("depth", 2))
+            limit = int(request.GET.get("limit", 200))
+        except ValueError:
+            return JsonResponse({"error": "Invalid parameters."}, status=400)
+
+        if not ids or len(ids) > self.max_ids:
+            return JsonResponse({"error": f"Pass between 1 and {self.max_ids} ids."}, status=400)
+        depth = max(1, min(depth, self.max_depth))
+        limit = max(1, min(limit, self.max_limit))
+
+        # Only expand people that belong to this family
+        ids = list(Person.objects.filter(family_id=family_id, id__in=ids).values_list("id", flat=True))
+        children, next_cursor = expand_subtrees(
+            ids,
+            depth=depth,
+            show_deceased=show_deceased,
+            cursor=request.GET.get("cursor"),
+            limit=limit,
+        )
+        return JsonResponse({
+            "children": {str(pid): nodes for pid, nodes in children.items()},
+            "next_cursor": next_cursor,
+        })
@@ -91,6 +91,38 @@ DATABASES = {
     }
 }
 
+# CACHE
+# Local memory by default (tests, single-process dev). Point CACHE_BACKEND and
+# CACHE_LOCATION at a shared cache (e.g. Redis/Memcached) in production.
+CACHES = {
+    'default': {
+        'BACKEND': config("CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"),
+        'LOCATION': config("CACHE_LOCATION", default="familytree"),
+        'TIMEOUT': config("CACHE_TIMEOUT", default=3600, cast=int),
+    }
+}
+
+# Cache alias used for rendered tree JSON
+TREE_CACHE_ALIAS = config("TREE_CACHE_ALIAS", default="default")
+
+# SEARCH
+# Minimum trigram similarity for fuzzy name search (0-1)
+SEARCH_TRIGRAM_THRESHOLD = config("SEARCH_TRIGRAM_THRESHOLD", default=0.3, cast=float)
+# Per-process LRU of search result id lists (apps/search/cache.py)
+SEARCH_RESULT_CACHE_BYTES = config("SEARCH_RESULT_CACHE_BYTES", default=32 * 1024 * 1024, cast=int)
+# Result sets longer than this are paged from the database instead of cached
+SEARCH_RESULT_CACHE_MAX_IDS = config("SEARCH_RESULT_CACHE_MAX_IDS", default=5000, cast=int)
+
+# EXPORTS
+# Jobs each run_export_worker process builds at once (apps/exports/jobs.py)
+EXPORT_WORKER_CONCURRENCY = config("EXPORT_WORKER_CONCURRENCY", default=2, cast=int)
+# Worker processes for jobs that chart several people at once
+EXPORT_PROCESSES = config("EXPORT_PROCESSES", default=4, cast=int)
+# Seconds an unused export file is kept; each reuse extends it
+EXPORT_ARTIFACT_TTL = config("EXPORT_ARTIFACT_TTL", default=7 * 24 * 3600, cast=int)
+# A running job with no worker heartbeat for this many seconds is queued again
+EXPORT_JOB_HEARTBEAT_TIMEOUT = config("EXPORT_JOB_HEARTBEAT_TIMEOUT", default=120, cast=int)
+
 # PASSWORD VALIDATION
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -10,10 +10,16 @@ const zoom = d3.zoom()
 d3.select(canvas).call(zoom);
 
 let treeData;
+let currentTransform = d3.zoomIdentity;
+let showDeceased = true;
+
+// Generations loaded per expansion and children per page of a wide sibling set
+const EXPAND_DEPTH = 2;
+const EXPAND_LIMIT = 200;
 
 // Fetch tree data from Django API
-function fetchTree(showDeceased = true) {
-  const apiUrl = `/families/${FAMILY_ID}/tree/api/${ROOT_ID}/?show_deceased=${showDeceased}`;
+function fetchTree() {
+  const apiUrl = `${TREE_URL}api/${ROOT_ID}/?show_deceased=${showDeceased}`;
 
   fetch(apiUrl)
     .then(res => {
@@ -22,13 +28,51 @@ function fetchTree(showDeceased = true) {
     })
     .then(data => {
       treeData = d3.hierarchy(data);
-      draw(d3.zoomIdentity);  // initial draw with identity transform
+      draw(currentTransform);
     })
     .catch(err => console.error("Error fetching tree data:", err));
 }
 
+// Load the next generations below a node marked `has_more` and graft them
+// onto the existing hierarchy instead of reloading the whole tree.
+function expandNode(node) {
+  const params = new URLSearchParams({
+    ids: node.data.id,
+    depth: EXPAND_DEPTH,
+    limit: EXPAND_LIMIT,
+    show_deceased: showDeceased,
+  });
+  if (node.data.cursor) params.set("cursor", node.data.cursor);
+
+  node.data.has_more = false;  // avoid double requests while loading
+  fetch(`${TREE_URL}api/expand/?${params}`)
+    .then(res => {
+      if (!res.ok) throw new Error(`HTTP error! status: ${res.status}`);
+      return res.json();
+    })
+    .then(data => {
+      const children = data.children[node.data.id] || [];
+      children.forEach(childData => {
+        const child = d3.hierarchy(childData);
+        child.each(d => { d.depth += node.depth + 1; });
+        child.parent = node;
+        node.children = (node.children || []).concat(child);
+        node.data.children.push(childData);
+      });
+      // More siblings left: keep the node expandable from where we stopped
+      node.data.cursor = data.next_cursor;
+      node.data.has_more = Boolean(data.next_cursor);
+      draw(currentTransform);
+    })
+    .catch(err => {
+      node.data.has_more = true;
+      console.error("Error expanding node:", err);
+    });
+}
+
 // Draw tree on canvas
 function draw(transform) {
+  currentTransform = transform;
   if (!treeData) return;
 
   context.save();
@@ -64,14 +108,31 @@ function draw(transform) {
     context.font = "12px sans-serif";
     context.textAlign = "center";
     context.fillText(d.data.name, d.x, d.y - 20);
+
+    // Marker for nodes whose children have not been loaded yet
+    if (d.data.has_more) {
+      context.fillStyle = "#fff";
+      context.font = "bold 14px sans-serif";
+      context.fillText("+", d.x, d.y + 5);
+    }
   });
 
   context.restore();
 }
 
+// Click a "+" node to load its next generations
+canvas.addEventListener("click", event => {
+  if (!treeData) return;
+  const rect = canvas.getBoundingClientRect();
+  const [x, y] = currentTransform.invert([event.clientX - rect.left, event.clientY - rect.top]);
+  const hit = treeData.descendants().find(d => Math.hypot(d.x - x, d.y - y) <= 14);
+  if (hit && hit.data.has_more) expandNode(hit);
+});
+
 // Toggle deceased members
 document.getElementById("toggleDeceased").addEventListener("change", e => {
-  fetchTree(e.target.checked);
+  showDeceased = e.target.checked;
+  fetchTree();
 });
 
 // Fetch initial tree